@@ -1,30 +1,72 @@
 import os
+import re
+import string
 import json
-from datetime import datetime, timedelta
+import hashlib
+import secrets
+import time
+import queue
+import threading
+import concurrent.futures
+import atexit
+import sqlite3
+import shutil
+import mimetypes
+from datetime import date, datetime, timedelta, timezone
 from uuid import uuid4
 from pathlib import Path
-from flask import Flask, render_template, request, flash, jsonify, session, redirect, url_for
+from flask import Flask, render_template, request, flash, jsonify, session, redirect, url_for, Response, stream_with_context, abort, send_from_directory, has_request_context
+from flask.sessions import SecureCookieSessionInterface
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateIndex
+import click
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
-from agno.agent import Agent
-from agno.models.groq import Groq
-from agno.media import Image as AgnoImage
-import markdown2
+from werkzeug.security import generate_password_hash, check_password_hash, safe_join
+from werkzeug.wsgi import ClosingIterator
+from markupsafe import escape
+from prometheus_client import CollectorRegistry, Counter, Histogram, REGISTRY, CONTENT_TYPE_LATEST, generate_latest, multiprocess
+import httpx
 from config import Config
+import llm_backends
 import signal
 from functools import wraps
-
-# Global flag to track if we're currently rate-limited
-RATE_LIMITED = False
-RATE_LIMIT_RESET_TIME = None
+from collections import OrderedDict
+from itertools import repeat
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config.from_object(Config)
 
+# Long-lived pool shared by all requests for dispatching agent calls
+AGENT_EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+    max_workers=app.config['AGENT_POOL_SIZE'],
+    thread_name_prefix='agent'
+)
+
+# Process-level agent registry keyed by (api_key, model_id)
+_AGENT_REGISTRY = {}
+_AGENT_REGISTRY_LOCK = threading.Lock()
+_HTTP_CLIENT = None
+_HTTP_CLIENT_PID = None
+
 # Database setup
 db = SQLAlchemy(app)
+
+@event.listens_for(Engine, 'connect')
+def apply_sqlite_profile(dbapi_connection, connection_record):
+    """Tune each new SQLite connection so readers don't block writers under multiple workers"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={app.config['SQLITE_JOURNAL_MODE']}")
+    cursor.execute(f"PRAGMA synchronous={app.config['SQLITE_SYNCHRONOUS']}")
+    cursor.execute(f"PRAGMA busy_timeout={int(app.config['SQLITE_BUSY_TIMEOUT_MS'])}")
+    cursor.execute(f"PRAGMA mmap_size={int(app.config['SQLITE_MMAP_SIZE'])}")
+    cursor.execute(f"PRAGMA cache_size={int(app.config['SQLITE_CACHE_SIZE'])}")
+    cursor.close()
 login_manager = LoginManager(app)
 login_manager.login_view = 'login'
 
@@ -44,14 +86,24 @@ class User(UserMixin, db.Model):
     progress = db.relationship('Progress', backref='user', lazy=True)
 
 class JournalEntry(db.Model):
+    __table_args__ = (
+        db.Index('ix_journal_entry_user_created', 'user_id', 'created_at'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     content = db.Column(db.Text, nullable=False)
     mood = db.Column(db.String(50))
-    tags = db.Column(db.String(200))
+    analyzed_mood = db.Column(db.String(20))  # analyze_mood() of the content
+    tags = db.Column(db.String(200))  # as typed; normalized_tags holds the parsed list
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    normalized_tags = db.relationship('Tag', secondary='journal_entry_tag')
 
 class Progress(db.Model):
+    __table_args__ = (
+        db.Index('ix_progress_user_date', 'user_id', 'date'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     date = db.Column(db.Date, default=datetime.utcnow().date)
@@ -60,6 +112,113 @@ class Progress(db.Model):
     social_score = db.Column(db.Integer)  # 1-10
     notes = db.Column(db.Text)
 
+class ProgressRollup(db.Model):
+    """Per-user Progress aggregates for one day, week (starting Monday) or month, kept in step on insert"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    bucket = db.Column(db.String(5), primary_key=True)  # 'day', 'week' or 'month'
+    period_start = db.Column(db.Date, primary_key=True)
+    count = db.Column(db.Integer, default=0, nullable=False)
+    mood_sum = db.Column(db.Integer, default=0, nullable=False)
+    mood_min = db.Column(db.Integer)
+    mood_max = db.Column(db.Integer)
+    activity_sum = db.Column(db.Integer, default=0, nullable=False)
+    activity_min = db.Column(db.Integer)
+    activity_max = db.Column(db.Integer)
+    social_sum = db.Column(db.Integer, default=0, nullable=False)
+    social_min = db.Column(db.Integer)
+    social_max = db.Column(db.Integer)
+
+class ResponseCache(db.Model):
+    """Cached LLM generations shared by all workers through the database"""
+    key = db.Column(db.String(64), primary_key=True)  # sha256 of the cache key parts
+    agent_name = db.Column(db.String(50), nullable=False)
+    content = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    hits = db.Column(db.Integer, default=0, nullable=False)
+
+class StatCounter(db.Model):
+    """Named counters shared across workers (e.g. cache hits and misses)"""
+    name = db.Column(db.String(100), primary_key=True)
+    value = db.Column(db.Integer, default=0, nullable=False)
+
+class RateLimitState(db.Model):
+    """Shared LLM rate-limit budget used by every worker"""
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, default=0, nullable=False)  # optimistic lock
+    request_tokens = db.Column(db.Float, nullable=False)  # requests-per-minute bucket
+    daily_tokens = db.Column(db.Float, nullable=False)  # tokens-per-day bucket
+    updated_at = db.Column(db.DateTime, nullable=False)
+    blocked_until = db.Column(db.DateTime)
+
+class UserStats(db.Model):
+    """Per-user journal stats maintained incrementally for the dashboard"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    total_entries = db.Column(db.Integer, default=0, nullable=False)
+    first_entry_at = db.Column(db.DateTime)
+    last_entry_date = db.Column(db.Date)
+    streak = db.Column(db.Integer, default=0, nullable=False)  # consecutive days ending at last_entry_date
+
+class UserMoodCount(db.Model):
+    """Per-user journal entry count for each mood"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    mood = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, default=0, nullable=False)
+
+class Tag(db.Model):
+    """A journal tag shared by all users; `key` is the case-folded name used for matching"""
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(50), unique=True, nullable=False)
+    name = db.Column(db.String(50), nullable=False)
+
+journal_entry_tag = db.Table(
+    'journal_entry_tag',
+    db.Column('entry_id', db.Integer, db.ForeignKey('journal_entry.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('tag_id', db.Integer, db.ForeignKey('tag.id'), primary_key=True),
+    db.Index('ix_journal_entry_tag_tag', 'tag_id', 'entry_id')
+)
+
+class UserTagCount(db.Model):
+    """Per-user journal entry count for each tag"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    tag_id = db.Column(db.Integer, db.ForeignKey('tag.id'), primary_key=True)
+    count = db.Column(db.Integer, default=0, nullable=False)
+
+class PlanResult(db.Model):
+    """Generated recovery plan responses, kept server-side and addressed by a short id"""
+    id = db.Column(db.String(16), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    plan_type = db.Column(db.String(20))
+    responses = db.Column(db.Text, nullable=False, default='{}')  # JSON object keyed by agent name
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+class CommunityPost(db.Model):
+    """A community feed post; hearts and hugs are counters kept in step with PostReaction"""
+    __table_args__ = (
+        db.Index('ix_community_post_category_id', 'category', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    category = db.Column(db.String(20), nullable=False, default='general')
+    content = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    hearts = db.Column(db.Integer, default=0, nullable=False)
+    hugs = db.Column(db.Integer, default=0, nullable=False)
+    author = db.relationship('User')
+
+class PostReaction(db.Model):
+    """One user's heart or hug on a community post"""
+    post_id = db.Column(db.Integer, db.ForeignKey('community_post.id', ondelete='CASCADE'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    kind = db.Column(db.String(10), primary_key=True)  # 'heart' or 'hug'
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+class SchemaVersion(db.Model):
+    """Single-row record of the last applied schema migration"""
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, default=0, nullable=False)
+
 @login_manager.user_loader
 def load_user(user_id):
     return User.query.get(int(user_id))
@@ -67,9 +226,48 @@ def load_user(user_id):
 # ------------------------------
 # Helper Functions
 # ------------------------------
-def create_agents(api_key: str):
+def llm_http_timeout():
+    """HTTP timeout for LLM calls, capped at the agent deadline"""
+    # A call abandoned at the deadline keeps its AGENT_EXECUTOR thread until the request
+    # itself gives up, so a longer timeout lets a few slow calls exhaust the pool
+    return min(app.config['LLM_HTTP_TIMEOUT'], app.config['AGENT_TIMEOUT'])
+
+def get_http_client():
+    """Return the process-wide keep-alive HTTP client used for LLM calls"""
+    global _HTTP_CLIENT, _HTTP_CLIENT_PID
+
+    # Connection pools must not be shared across a gunicorn fork
+    if _HTTP_CLIENT is None or _HTTP_CLIENT_PID != os.getpid():
+        limits = httpx.Limits(
+            max_connections=app.config['LLM_MAX_CONNECTIONS'],
+            max_keepalive_connections=app.config['LLM_MAX_CONNECTIONS'],
+            keepalive_expiry=app.config['LLM_KEEPALIVE_EXPIRY']
+        )
+        _HTTP_CLIENT = httpx.Client(
+            limits=limits,
+            timeout=httpx.Timeout(llm_http_timeout()),
+            transport=llm_backends.make_transport(app.config, limits)
+        )
+        _HTTP_CLIENT_PID = os.getpid()
+    return _HTTP_CLIENT
+
+def import_llm_stack():
+    """Import agno and its Groq model on first use; routes that never call the LLM don't pay for them"""
+    from agno.agent import Agent
+    from agno.models.groq import Groq
+    return Agent, Groq
+
+def create_agents(api_key: str, model_id: str = None):
     """Create AI agents with enhanced instructions"""
-    model = Groq(id="llama-3.1-8b-instant", api_key=api_key)
+    Agent, Groq = import_llm_stack()
+    model = Groq(
+        id=model_id or app.config['GROQ_MODEL_ID'],
+        api_key=api_key,
+        base_url=app.config['LLM_BASE_URL'],
+        http_client=get_http_client(),
+        # A retry would only finish after the caller's deadline has passed
+        max_retries=0
+    )
     
     therapist = Agent(
         model=model,
@@ -126,254 +324,1359 @@ def create_agents(api_key: str):
     
     return therapist, closure, planner, honesty
 
-def analyze_mood(text):
-    """Enhanced mood analysis from text"""
-    text_lower = text.lower()
-    
-    # Expanded keyword lists
-    positive_words = {
-        'happy', 'better', 'improving', 'hope', 'healing', 'strong', 
+def get_llm_api_key():
+    """The Groq key, or a placeholder when the configured backend never reaches Groq"""
+    if app.config['LLM_BACKEND'] in ('mock', 'replay'):
+        return app.config['GROQ_API_KEY'] or 'offline'
+    return app.config['GROQ_API_KEY']
+
+def get_agents(api_key: str, model_id: str = None):
+    """Return the agents for this API key and model, building them once per process"""
+    key = (api_key, model_id or app.config['GROQ_MODEL_ID'])
+    agents = _AGENT_REGISTRY.get(key)
+    if agents is None:
+        with _AGENT_REGISTRY_LOCK:
+            # Another thread may have built them while we waited for the lock
+            agents = _AGENT_REGISTRY.get(key)
+            if agents is None:
+                agents = create_agents(*key)
+                _AGENT_REGISTRY[key] = agents
+    return agents
+
+def invalidate_agents():
+    """Drop cached agents and the HTTP client so the next request rebuilds them from config"""
+    global _HTTP_CLIENT, _HTTP_CLIENT_PID
+    with _AGENT_REGISTRY_LOCK:
+        _AGENT_REGISTRY.clear()
+        if _HTTP_CLIENT is not None and _HTTP_CLIENT_PID == os.getpid():
+            _HTTP_CLIENT.close()
+        _HTTP_CLIENT = None
+        _HTTP_CLIENT_PID = None
+
+class MoodAnalyzer:
+    """Keyword mood analyzer with its word scores and punctuation table built once"""
+
+    POSITIVE_WORDS = frozenset({
+        'happy', 'better', 'improving', 'hope', 'healing', 'strong',
         'good', 'great', 'awesome', 'excited', 'peace', 'calm',
         'grateful', 'love', 'joy', 'confident', 'optimistic',
         'proud', 'won', 'success', 'growth', 'smile', 'laugh'
-    }
-    negative_words = {
-        'sad', 'pain', 'hurt', 'lonely', 'depressed', 'angry', 
+    })
+    NEGATIVE_WORDS = frozenset({
+        'sad', 'pain', 'hurt', 'lonely', 'depressed', 'angry',
         'bad', 'worse', 'broken', 'confused', 'lost', 'tears',
         'anxious', 'afraid', 'scared', 'hate', 'miss', 'crying',
         'stuck', 'guilty', 'ashamed', 'regret', 'dark', 'tired'
-    }
-    
-    # Simple token-based scoring
-    # Remove punctuation for better matching
-    import string
-    translator = str.maketrans('', '', string.punctuation)
-    clean_text = text_lower.translate(translator)
-    
-    # Crisis detection (Priority)
-    crisis_keywords = {
-        'die', 'suicide', 'kill', 'end it', 'no point', 'give up', 
+    })
+    CRISIS_KEYWORDS = (
+        'die', 'suicide', 'kill', 'end it', 'no point', 'give up',
         'death', 'hurt myself', 'tired of life', 'quit life', 'dead'
+    )
+
+    def __init__(self):
+        self.translator = str.maketrans('', '', string.punctuation)
+        # +1 for positive, -1 for negative, so one pass over the tokens gives the balance
+        self.word_scores = {word: 1 for word in self.POSITIVE_WORDS}
+        self.word_scores.update({word: -1 for word in self.NEGATIVE_WORDS})
+
+    def analyze(self, text):
+        """Classify text as crisis, improving, struggling or neutral"""
+        # Remove punctuation for better matching
+        clean_text = text.lower().translate(self.translator)
+
+        # Crisis detection (Priority). Phrases match as substrings; CPython's
+        # substring search beats a combined regex alternation here.
+        for keyword in self.CRISIS_KEYWORDS:
+            if keyword in clean_text:
+                return "crisis"
+
+        balance = sum(map(self.word_scores.get, clean_text.split(), repeat(0)))
+        if balance > 0:
+            return "improving"
+        elif balance < 0:
+            return "struggling"
+        else:
+            return "neutral"
+
+MOOD_ANALYZER = MoodAnalyzer()
+
+def analyze_mood(text):
+    """Enhanced mood analysis from text"""
+    return MOOD_ANALYZER.analyze(text)
+
+def analyze_moods(texts):
+    """Score many texts at once, returning moods in input order"""
+    analyze = MOOD_ANALYZER.analyze
+    return [analyze(text) for text in texts]
+
+def increment_counter(name, amount=1):
+    """Add to a shared counter; the caller commits"""
+    updated = db.session.execute(
+        db.update(StatCounter).where(StatCounter.name == name)
+        .values(value=StatCounter.value + amount)
+    ).rowcount
+    if not updated:
+        try:
+            with db.session.begin_nested():
+                db.session.add(StatCounter(name=name, value=amount))
+        except IntegrityError:
+            # Another worker created it first
+            db.session.execute(
+                db.update(StatCounter).where(StatCounter.name == name)
+                .values(value=StatCounter.value + amount)
+            )
+
+def get_counter(name):
+    """Read a shared counter"""
+    counter = db.session.get(StatCounter, name)
+    return counter.value if counter else 0
+
+def normalize_prompt(text):
+    """Normalize user input so near-identical submissions share a cache key"""
+    text = re.sub(r'[^\w\s]', '', text.lower())
+    return ' '.join(text.split())
+
+def response_cache_key(agent_name, agent, user_input, plan_type):
+    """Cache key from agent name, model id, instructions, normalized input and plan type"""
+    instructions_hash = hashlib.sha256(json.dumps(agent.instructions).encode()).hexdigest()
+    parts = [agent_name, agent.model.id, instructions_hash, normalize_prompt(user_input), plan_type]
+    return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+def plan_agents_config(groq_key, user_input, plan_type):
+    """(agent_name, agent, prompt) for each section of a recovery plan"""
+    therapist, closure, planner, honesty = get_agents(groq_key)
+    return [
+        ('therapist', therapist, f"Situation: {user_input}"),
+        ('planner', planner, f"Create a {plan_type} recovery plan for: {user_input}"),
+        ('closure', closure, f"Situation: {user_input}"),
+        ('honesty', honesty, f"Situation: {user_input}")
+    ]
+
+def plan_cache_keys(agents_config, user_input, plan_type):
+    """Response cache keys for a generate_plan request, or {} when caching is off"""
+    if not app.config['LLM_CACHE_ENABLED']:
+        return {}
+    return {
+        agent_name: response_cache_key(agent_name, agent, user_input, plan_type)
+        for agent_name, agent, _ in agents_config
     }
-    if any(keyword in clean_text for keyword in crisis_keywords):
-        return "crisis"
-        
-    words = clean_text.split()
-    
-    pos_count = sum(1 for word in words if word in positive_words)
-    neg_count = sum(1 for word in words if word in negative_words)
-    
-    if pos_count > neg_count:
-        return "improving"
-    elif neg_count > pos_count:
-        return "struggling"
+
+def get_cached_responses(cache_keys):
+    """Look up {agent_name: key} in the response cache and return {agent_name: content} for hits"""
+    if not cache_keys:
+        return {}
+
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=app.config['LLM_CACHE_TTL'])
+    entries = ResponseCache.query.filter(
+        ResponseCache.key.in_(cache_keys.values()),
+        ResponseCache.created_at >= cutoff
+    ).all()
+    by_key = {entry.key: entry for entry in entries}
+
+    cached = {}
+    for agent_name, key in cache_keys.items():
+        entry = by_key.get(key)
+        if entry:
+            entry.last_used_at = now
+            entry.hits += 1
+            cached[agent_name] = entry.content
+
+    increment_counter('llm_cache_hits', len(cached))
+    increment_counter('llm_cache_misses', len(cache_keys) - len(cached))
+    db.session.commit()
+    return cached
+
+def store_cached_responses(cache_keys, responses):
+    """Save fresh generations for {agent_name: key} and evict expired/least recently used entries"""
+    if not responses:
+        return
+
+    now = datetime.utcnow()
+    for agent_name, content in responses.items():
+        db.session.merge(ResponseCache(
+            key=cache_keys[agent_name],
+            agent_name=agent_name,
+            content=content,
+            created_at=now,
+            last_used_at=now,
+            hits=0
+        ))
+
+    # Expire by TTL, then trim to the size limit by last use
+    cutoff = now - timedelta(seconds=app.config['LLM_CACHE_TTL'])
+    ResponseCache.query.filter(ResponseCache.created_at < cutoff).delete(synchronize_session=False)
+    db.session.flush()
+    overflow = ResponseCache.query.count() - app.config['LLM_CACHE_MAX_ENTRIES']
+    if overflow > 0:
+        oldest = db.session.query(ResponseCache.key)\
+            .order_by(ResponseCache.last_used_at.asc()).limit(overflow).subquery()
+        ResponseCache.query.filter(ResponseCache.key.in_(db.select(oldest.c.key)))\
+            .delete(synchronize_session=False)
+    db.session.commit()
+
+# ------------------------------
+# Journal Stats
+# ------------------------------
+def as_date(value):
+    """Normalize a SQL date() result (a string on SQLite) to a date"""
+    if isinstance(value, str):
+        return datetime.strptime(value[:10], '%Y-%m-%d').date()
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+def recompute_user_stats(user_id):
+    """Rebuild a user's journal stats from SQL aggregates; the caller commits"""
+    total, first_entry_at = db.session.query(
+        db.func.count(JournalEntry.id), db.func.min(JournalEntry.created_at)
+    ).filter(JournalEntry.user_id == user_id).one()
+
+    # Walk distinct entry dates newest first and stop at the first gap
+    entry_day = db.func.date(JournalEntry.created_at)
+    days = db.session.query(entry_day).filter(JournalEntry.user_id == user_id)\
+        .distinct().order_by(entry_day.desc()).yield_per(100)
+    last_entry_date = None
+    streak = 0
+    for (day,) in days:
+        day = as_date(day)
+        if last_entry_date is None:
+            last_entry_date = day
+        elif day != last_entry_date - timedelta(days=streak):
+            break
+        streak += 1
+
+    stats = db.session.get(UserStats, user_id) or UserStats(user_id=user_id)
+    stats.total_entries = total
+    stats.first_entry_at = first_entry_at
+    stats.last_entry_date = last_entry_date
+    stats.streak = streak
+    db.session.add(stats)
+
+    UserMoodCount.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    mood_counts = db.session.query(JournalEntry.mood, db.func.count(JournalEntry.id))\
+        .filter(JournalEntry.user_id == user_id, JournalEntry.mood.isnot(None))\
+        .group_by(JournalEntry.mood)
+    for mood, count in mood_counts:
+        db.session.add(UserMoodCount(user_id=user_id, mood=mood, count=count))
+
+    UserTagCount.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    tag_counts = db.session.query(journal_entry_tag.c.tag_id, db.func.count())\
+        .join(JournalEntry, JournalEntry.id == journal_entry_tag.c.entry_id)\
+        .filter(JournalEntry.user_id == user_id)\
+        .group_by(journal_entry_tag.c.tag_id)
+    for tag_id, count in tag_counts:
+        db.session.add(UserTagCount(user_id=user_id, tag_id=tag_id, count=count))
+    return stats
+
+def get_user_stats(user_id):
+    """Return a user's stats row, building it from history the first time"""
+    stats = db.session.get(UserStats, user_id)
+    if stats is None:
+        stats = recompute_user_stats(user_id)
+        db.session.commit()
+    return stats
+
+def record_journal_entry(entry):
+    """Fold a newly added journal entry into its user's stats; the caller commits"""
+    stats = db.session.get(UserStats, entry.user_id)
+    if stats is None:
+        # First time we see this user: the aggregates already include the new entry
+        db.session.flush()
+        return recompute_user_stats(entry.user_id)
+
+    entry_date = entry.created_at.date()
+    if stats.last_entry_date is None or entry_date > stats.last_entry_date + timedelta(days=1):
+        stats.streak = 1
+    elif entry_date == stats.last_entry_date + timedelta(days=1):
+        stats.streak += 1
+    if stats.last_entry_date is None or entry_date > stats.last_entry_date:
+        stats.last_entry_date = entry_date
+    if stats.first_entry_at is None or entry.created_at < stats.first_entry_at:
+        stats.first_entry_at = entry.created_at
+    stats.total_entries = UserStats.total_entries + 1
+
+    if entry.mood:
+        updated = db.session.execute(
+            db.update(UserMoodCount)
+            .where(UserMoodCount.user_id == entry.user_id, UserMoodCount.mood == entry.mood)
+            .values(count=UserMoodCount.count + 1)
+        ).rowcount
+        if not updated:
+            db.session.add(UserMoodCount(user_id=entry.user_id, mood=entry.mood, count=1))
+
+    for tag in entry.normalized_tags:
+        updated = db.session.execute(
+            db.update(UserTagCount)
+            .where(UserTagCount.user_id == entry.user_id, UserTagCount.tag_id == tag.id)
+            .values(count=UserTagCount.count + 1)
+        ).rowcount
+        if not updated:
+            db.session.add(UserTagCount(user_id=entry.user_id, tag_id=tag.id, count=1))
+    return stats
+
+def most_common_mood(user_id):
+    """The mood a user has journaled most often"""
+    top = UserMoodCount.query.filter_by(user_id=user_id)\
+        .order_by(UserMoodCount.count.desc()).first()
+    return top.mood if top else 'neutral'
+
+# ------------------------------
+# Journal Tags
+# ------------------------------
+MAX_TAGS_PER_ENTRY = 10
+TAG_MAX_LENGTH = 50
+
+def parse_tags(text):
+    """Split a comma-separated tag list into unique (key, name) pairs, in the order given"""
+    tags = {}
+    for name in (text or '').split(','):
+        name = ' '.join(name.split())[:TAG_MAX_LENGTH]
+        key = name.casefold()[:TAG_MAX_LENGTH]
+        if key and key not in tags:
+            tags[key] = name
+    return list(tags.items())[:MAX_TAGS_PER_ENTRY]
+
+def get_or_create_tags(pairs):
+    """Tag rows for (key, name) pairs, creating the missing ones; the caller commits"""
+    if not pairs:
+        return []
+    tags = {tag.key: tag for tag in Tag.query.filter(Tag.key.in_([key for key, _ in pairs]))}
+    for key, name in pairs:
+        if key in tags:
+            continue
+        try:
+            with db.session.begin_nested():
+                tags[key] = Tag(key=key, name=name)
+                db.session.add(tags[key])
+        except IntegrityError:
+            # Another worker created it first
+            tags[key] = Tag.query.filter_by(key=key).one()
+    return [tags[key] for key, _ in pairs]
+
+def top_tags(user_id, limit=20):
+    """A user's most used tags as (name, count), from the maintained counts"""
+    return db.session.query(Tag.name, UserTagCount.count)\
+        .join(Tag, Tag.id == UserTagCount.tag_id)\
+        .filter(UserTagCount.user_id == user_id, UserTagCount.count > 0)\
+        .order_by(UserTagCount.count.desc(), Tag.name)\
+        .limit(limit).all()
+
+# ------------------------------
+# Journal Pagination
+# ------------------------------
+def encode_journal_cursor(entry):
+    """Keyset cursor for the position just after an entry"""
+    return f"{entry.created_at.isoformat()}_{entry.id}"
+
+def decode_journal_cursor(cursor):
+    """Parse a keyset cursor into (created_at, id); raises ValueError if malformed or out of range"""
+    created_at, _, entry_id = cursor.rpartition('_')
+    entry_id = int(entry_id)
+    # Larger values overflow SQLite's 64-bit integers when bound
+    if not 1 <= entry_id <= 2 ** 63 - 1:
+        raise ValueError(f'Cursor out of range: {cursor}')
+    return datetime.fromisoformat(created_at), entry_id
+
+def journal_page(user_id, before=None, limit=None, tag=None):
+    """One page of a user's journal, newest first, as (entries, next_cursor), optionally only one tag; raises ValueError for a bad cursor"""
+    limit = limit or app.config['JOURNAL_PAGE_SIZE']
+    query = JournalEntry.query.filter(JournalEntry.user_id == user_id)
+    if tag:
+        query = query.join(journal_entry_tag, journal_entry_tag.c.entry_id == JournalEntry.id)\
+            .join(Tag, Tag.id == journal_entry_tag.c.tag_id)\
+            .filter(Tag.key == tag.casefold())
+    if before:
+        created_at, entry_id = decode_journal_cursor(before)
+        query = query.filter(db.or_(
+            JournalEntry.created_at < created_at,
+            db.and_(JournalEntry.created_at == created_at, JournalEntry.id < entry_id)
+        ))
+
+    # Fetch one extra row to know whether another page exists
+    entries = query.order_by(JournalEntry.created_at.desc(), JournalEntry.id.desc())\
+        .limit(limit + 1).all()
+    next_cursor = encode_journal_cursor(entries[limit - 1]) if len(entries) > limit else None
+    return entries[:limit], next_cursor
+
+def serialize_journal_entry(entry):
+    """JSON form of a journal entry, with the same date labels the template shows"""
+    return {
+        'id': entry.id,
+        'content': entry.content,
+        'mood': entry.mood,
+        'tags': [tag.strip() for tag in entry.tags.split(',')] if entry.tags else [],
+        'created_at': entry.created_at.isoformat(),
+        'date_label': entry.created_at.strftime('%A, %B %d, %Y'),
+        'time_label': entry.created_at.strftime('%I:%M %p')
+    }
+
+# ------------------------------
+# Journal Search
+# ------------------------------
+# SQLite: an external-content FTS5 index over journal_entry, kept in sync by triggers. Each row
+# also carries an `owner` token (u<user_id>) so a search only walks that user's posting list.
+# Postgres: a generated tsvector column with a GIN index. Both are created by migration 4.
+JOURNAL_FTS = 'journal_entry_fts'
+SNIPPET_START, SNIPPET_END = '\x02', '\x03'  # replaced by <mark> after the snippet is escaped
+
+SQLITE_JOURNAL_SEARCH = [
+    """CREATE VIEW IF NOT EXISTS journal_entry_search_source AS
+        SELECT id, content, tags, 'u' || user_id AS owner FROM journal_entry""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS journal_entry_fts USING fts5(
+        content, tags, owner,
+        content='journal_entry_search_source', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS journal_entry_fts_insert AFTER INSERT ON journal_entry BEGIN
+        INSERT INTO journal_entry_fts(rowid, content, tags, owner)
+        VALUES (new.id, new.content, new.tags, 'u' || new.user_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS journal_entry_fts_delete AFTER DELETE ON journal_entry BEGIN
+        INSERT INTO journal_entry_fts(journal_entry_fts, rowid, content, tags, owner)
+        VALUES ('delete', old.id, old.content, old.tags, 'u' || old.user_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS journal_entry_fts_update AFTER UPDATE OF content, tags, user_id ON journal_entry BEGIN
+        INSERT INTO journal_entry_fts(journal_entry_fts, rowid, content, tags, owner)
+        VALUES ('delete', old.id, old.content, old.tags, 'u' || old.user_id);
+        INSERT INTO journal_entry_fts(rowid, content, tags, owner)
+        VALUES (new.id, new.content, new.tags, 'u' || new.user_id);
+    END""",
+    "INSERT INTO journal_entry_fts(journal_entry_fts) VALUES ('rebuild')",
+]
+
+POSTGRES_JOURNAL_SEARCH = [
+    """ALTER TABLE journal_entry ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(content, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(tags, '')), 'B')
+        ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_journal_entry_search ON journal_entry USING gin (search_vector)",
+]
+
+def fts5_query(text, user_id):
+    """FTS5 MATCH expression for free text, every word quoted so operators and punctuation are literal"""
+    # No prefix queries: the porter stemmer already matches word forms, and a prefix
+    # scan over a common word's doclist costs several times the whole search
+    terms = [f'"{term.replace(chr(34), chr(34) * 2)}"' for term in text.split()]
+    # Scope the words to the text columns, or "u1" would match every entry of user 1
+    return f'owner : "u{user_id}" AND {{content tags}} : (' + ' AND '.join(terms) + ')'
+
+def highlight_snippet(snippet):
+    """Escape a snippet of user text, then turn the match markers into <mark> tags"""
+    html = str(escape(snippet))
+    return html.replace(SNIPPET_START, '<mark>').replace(SNIPPET_END, '</mark>')
+
+def search_journal(user_id, text, mood=None, date_from=None, date_to=None, limit=None, offset=0):
+    """A user's journal entries matching free text, best first, as (entry, snippet html) pairs"""
+    limit = limit or app.config['JOURNAL_PAGE_SIZE']
+    if db.engine.dialect.name == 'postgresql':
+        query = db.func.websearch_to_tsquery('english', text)
+        vector = db.literal_column('journal_entry.search_vector')
+        snippet = db.func.ts_headline('english', JournalEntry.content, query,
+                                      f'StartSel={SNIPPET_START}, StopSel={SNIPPET_END}, '
+                                      'MaxFragments=2, MaxWords=24, MinWords=8')
+        rank = db.func.ts_rank(vector, query).desc()
+        statement = db.select(JournalEntry, snippet).where(vector.op('@@')(query))
     else:
-        return "neutral"
+        fts = db.table(JOURNAL_FTS, db.column('rowid'))
+        fts_ref = db.literal_column(JOURNAL_FTS)
+        snippet = db.func.snippet(fts_ref, 0, SNIPPET_START, SNIPPET_END, '…', 24)
+        # bm25 is lower-is-better; the owner column carries no weight
+        rank = db.func.bm25(fts_ref, 1.0, 0.5, 0.0)
+        statement = db.select(JournalEntry, snippet)\
+            .join(fts, fts.c.rowid == JournalEntry.id)\
+            .where(fts_ref.op('MATCH')(fts5_query(text, user_id)))
+
+    statement = statement.where(JournalEntry.user_id == user_id)
+    if mood:
+        statement = statement.where(JournalEntry.mood == mood)
+    if date_from:
+        statement = statement.where(JournalEntry.created_at >= datetime.combine(date_from, datetime.min.time()))
+    if date_to:
+        statement = statement.where(JournalEntry.created_at < datetime.combine(date_to + timedelta(days=1), datetime.min.time()))
+    statement = statement.order_by(rank, JournalEntry.created_at.desc()).limit(limit).offset(offset)
+    return [(entry, highlight_snippet(snippet)) for entry, snippet in db.session.execute(statement)]
 
 # ------------------------------
-# Routes
+# Progress Rollups
 # ------------------------------
+PROGRESS_BUCKETS = ('day', 'week', 'month')
+PROGRESS_SCORES = ('mood', 'activity', 'social')
+PROGRESS_BUCKET_DAYS = {'day': 1, 'week': 7, 'month': 30}
+PROGRESS_MAX_POINTS = 400  # per /api/progress response, e.g. a bit over a year of days
+
+def period_start(day, bucket):
+    """First day of the day, week (ISO, starting Monday) or month that contains `day`"""
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+def fold_progress_values(progress):
+    """UPDATE values that add a Progress row to an existing rollup"""
+    values = {'count': ProgressRollup.count + 1}
+    for score in PROGRESS_SCORES:
+        value = getattr(progress, f'{score}_score')
+        if value is None:
+            continue
+        total = getattr(ProgressRollup, f'{score}_sum')
+        low = getattr(ProgressRollup, f'{score}_min')
+        high = getattr(ProgressRollup, f'{score}_max')
+        values[f'{score}_sum'] = total + value
+        values[f'{score}_min'] = db.case((db.or_(low.is_(None), low > value), value), else_=low)
+        values[f'{score}_max'] = db.case((db.or_(high.is_(None), high < value), value), else_=high)
+    return values
+
+def record_progress(progress):
+    """Fold a newly added Progress row into its day, week and month rollups; the caller commits"""
+    for bucket in PROGRESS_BUCKETS:
+        key = (ProgressRollup.user_id == progress.user_id, ProgressRollup.bucket == bucket,
+               ProgressRollup.period_start == period_start(progress.date, bucket))
+        update = db.update(ProgressRollup).where(*key).values(**fold_progress_values(progress))
+        if db.session.execute(update).rowcount:
+            continue
+        rollup = ProgressRollup(user_id=progress.user_id, bucket=bucket,
+                                period_start=period_start(progress.date, bucket), count=1)
+        for score in PROGRESS_SCORES:
+            value = getattr(progress, f'{score}_score')
+            setattr(rollup, f'{score}_sum', value or 0)
+            setattr(rollup, f'{score}_min', value)
+            setattr(rollup, f'{score}_max', value)
+        try:
+            with db.session.begin_nested():
+                db.session.add(rollup)
+        except IntegrityError:
+            # Another worker started this period first
+            db.session.execute(update)
+
+def progress_series(user_id, bucket, date_from, date_to):
+    """Chart series of a user's rollups whose period starts within [date_from, date_to]"""
+    rollups = ProgressRollup.query.filter(
+        ProgressRollup.user_id == user_id, ProgressRollup.bucket == bucket,
+        ProgressRollup.period_start.between(period_start(date_from, bucket), date_to)
+    ).order_by(ProgressRollup.period_start).all()
+
+    label_format = '%b %Y' if bucket == 'month' else '%b %d'
+    series = {
+        'bucket': bucket,
+        'labels': [rollup.period_start.strftime(label_format) for rollup in rollups],
+        'periods': [rollup.period_start.isoformat() for rollup in rollups],
+        'entries': [rollup.count for rollup in rollups],
+    }
+    for score in PROGRESS_SCORES:
+        series[score] = {
+            'avg': [round(getattr(rollup, f'{score}_sum') / rollup.count, 1) for rollup in rollups],
+            'min': [getattr(rollup, f'{score}_min') for rollup in rollups],
+            'max': [getattr(rollup, f'{score}_max') for rollup in rollups],
+        }
+    return series
+
 # ------------------------------
-# Routes
+# Journal Writes
 # ------------------------------
-@app.route('/')
-def index():
-    """Home page with modern 2026 design"""
-    # Auto-login a guest user for demo purposes if not logged in
-    if not current_user.is_authenticated:
-        guest_user = User.query.filter_by(email='guest@healing.com').first()
-        if not guest_user:
-            guest_user = User(
-                username='Guest',
-                email='guest@healing.com',
-                password_hash=generate_password_hash('guest'),
-                location='India',
-                recovery_stage='healing'
-            )
-            db.session.add(guest_user)
-            db.session.commit()
-        login_user(guest_user)
+def save_journal_submission(submission):
+    """Insert a journal entry with its stats update and progress row; the caller commits"""
+    entry = JournalEntry(
+        user_id=submission['user_id'],
+        content=submission['content'],
+        mood=submission['mood'],
+        analyzed_mood=analyze_mood(submission['content']),
+        tags=submission['tags'],
+        created_at=submission['created_at'],
+        normalized_tags=get_or_create_tags(parse_tags(submission['tags']))
+    )
+    db.session.add(entry)
+    record_journal_entry(entry)
+    increment_counter(JOURNAL_COUNTER)
     
-    # Generate dynamic stats for homepage
+    # Update progress
+    progress = Progress(
+        user_id=submission['user_id'],
+        date=submission['created_at'].date(),
+        mood_score={'happy': 8, 'neutral': 5, 'sad': 3}.get(submission['mood'], 5),
+        activity_score=6,
+        social_score=5
+    )
+    db.session.add(progress)
+    record_progress(progress)
+    return entry
+
+# ------------------------------
+# Homepage Stats
+# ------------------------------
+# Shared counters kept in step with the tables, so the homepage never has to COUNT(*)
+USER_COUNTER = 'total_users'
+JOURNAL_COUNTER = 'total_journal_entries'
+GUEST_EMAIL = 'guest@healing.com'
+
+_HOMEPAGE_STATS = None
+_HOMEPAGE_STATS_EXPIRES = 0
+_GUEST_USER_ID = None
+
+def get_homepage_stats():
+    """Homepage numbers built from the shared counters, refreshed once per HOMEPAGE_STATS_TTL per worker"""
+    global _HOMEPAGE_STATS, _HOMEPAGE_STATS_EXPIRES
     import random
-    from datetime import datetime
-    
-    total_users = User.query.count()
-    total_entries = JournalEntry.query.count()
-    
-    homepage_stats = {
-        'healed_hearts': max(total_users * 10, random.randint(5000, 6000)),
-        'journal_entries': max(total_entries, random.randint(15000, 20000)),
-        'satisfaction_rate': 98,
-        'local_resources': 50,
-        'active_today': random.randint(200, 400)
+
+    now = time.monotonic()
+    if _HOMEPAGE_STATS is None or now >= _HOMEPAGE_STATS_EXPIRES:
+        counters = dict(db.session.query(StatCounter.name, StatCounter.value)
+                        .filter(StatCounter.name.in_([USER_COUNTER, JOURNAL_COUNTER])))
+        _HOMEPAGE_STATS = {
+            'healed_hearts': max(counters.get(USER_COUNTER, 0) * 10, random.randint(5000, 6000)),
+            'journal_entries': max(counters.get(JOURNAL_COUNTER, 0), random.randint(15000, 20000)),
+            'satisfaction_rate': 98,
+            'local_resources': 50,
+            'active_today': random.randint(200, 400)
+        }
+        _HOMEPAGE_STATS_EXPIRES = now + app.config['HOMEPAGE_STATS_TTL']
+    return _HOMEPAGE_STATS
+
+def get_guest_user():
+    """The shared demo account, fetched by primary key once its id is known"""
+    global _GUEST_USER_ID
+    if _GUEST_USER_ID is not None:
+        guest_user = db.session.get(User, _GUEST_USER_ID)
+        if guest_user:
+            return guest_user
+
+    guest_user = User.query.filter_by(email=GUEST_EMAIL).first()
+    if not guest_user:
+        guest_user = User(
+            username='Guest',
+            email=GUEST_EMAIL,
+            password_hash=generate_password_hash('guest'),
+            location='India',
+            recovery_stage='healing'
+        )
+        db.session.add(guest_user)
+        increment_counter(USER_COUNTER)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another worker created it first
+            db.session.rollback()
+            guest_user = User.query.filter_by(email=GUEST_EMAIL).one()
+    _GUEST_USER_ID = guest_user.id
+    return guest_user
+
+# ------------------------------
+# Community
+# ------------------------------
+COMMUNITY_CATEGORIES = ('general', 'advice', 'success', 'support', 'resources')
+COMMUNITY_POST_MAX_LENGTH = 2000
+# Reaction kind -> CommunityPost counter column
+REACTION_COUNTERS = {'heart': 'hearts', 'hug': 'hugs'}
+# Bumped with every new post so each worker can tell its cached first page is stale
+COMMUNITY_POST_COUNTER = 'community_posts'
+
+# {'version', 'expires', 'posts', 'next_cursor', 'stats', 'top_contributors'}
+_COMMUNITY_SNAPSHOT = None
+_COMMUNITY_SNAPSHOT_LOCK = threading.Lock()
+
+def format_time_ago(moment):
+    """'5 minutes ago' style label for a UTC timestamp"""
+    seconds = max(int((datetime.utcnow() - moment).total_seconds()), 0)
+    for unit, size in (('day', 86400), ('hour', 3600), ('minute', 60)):
+        if seconds >= size:
+            count = seconds // size
+            return f"{count} {unit}{'s' if count > 1 else ''} ago"
+    return 'just now'
+
+def serialize_post(post):
+    """JSON form of a community post; time_ago is added when it is served"""
+    return {
+        'id': post.id,
+        'author': post.author.username,
+        'category': post.category,
+        'content': post.content,
+        'created_at': post.created_at.isoformat(),
+        'hearts': post.hearts,
+        'hugs': post.hugs
     }
-        
-    return render_template('index.html', stats=homepage_stats)
 
-# Login/Register routes removed as per request to simplify access
+def with_time_ago(posts):
+    """Serialized posts with a fresh time_ago label"""
+    return [dict(post, time_ago=format_time_ago(datetime.fromisoformat(post['created_at']))) for post in posts]
 
-@app.route('/dashboard')
-# @login_required - removed for easier access
-def dashboard():
-    """User dashboard with progress tracking"""
-    # Ensure user is logged in (auto-login logic in index handles entry, but safety here)
-    if not current_user.is_authenticated:
-        return redirect(url_for('index'))
-        
-    recent_entries = JournalEntry.query.filter_by(user_id=current_user.id)\
-        .order_by(JournalEntry.created_at.desc()).limit(5).all()
-    
-    progress_data = Progress.query.filter_by(user_id=current_user.id)\
-        .order_by(Progress.date.desc()).limit(7).all()
-    
-    # Calculate dynamic stats
-    from datetime import datetime, timedelta
-    from collections import Counter
-    
-    all_entries = JournalEntry.query.filter_by(user_id=current_user.id).all()
-    total_entries = len(all_entries)
-    
-    # Calculate streak
-    streak = 0
-    if all_entries:
-        sorted_entries = sorted(all_entries, key=lambda x: x.created_at, reverse=True)
-        current_date = datetime.now().date()
-        for entry in sorted_entries:
-            entry_date = entry.created_at.date()
-            if entry_date == current_date or entry_date == current_date - timedelta(days=streak):
-                if entry_date == current_date - timedelta(days=streak):
-                    streak += 1
-                    current_date = entry_date
-            else:
-                break
-    
-    # Most common mood
-    moods = [entry.mood for entry in all_entries if entry.mood]
-    most_common_mood = Counter(moods).most_common(1)[0][0] if moods else 'neutral'
-    
-    # Days since start
-    days_active = 0
-    if all_entries:
-        first_entry = min(all_entries, key=lambda x: x.created_at)
-        days_active = (datetime.now() - first_entry.created_at).days + 1
-    
-    affirmations = [
-        "I am worthy of love and respect, especially from myself.",
-        "Healing is a journey, and I am taking it one day at a time.",
-        "My past does not define my future; I am growing every day.",
-        "I choose to let go of what I cannot control.",
-        "I am resilient, strong, and capable of overcoming this.",
-        "Self-love is the greatest middle finger of all time.",
-        "It's okay to not be okay, as long as I keep moving forward.",
-        "I deserve a life of peace and happiness.",
-        "My feelings are valid, but they do not control me.",
-        "Every end is a new beginning in disguise."
-    ]
-    import random
-    daily_affirmation = random.choice(affirmations)
-    
+def decode_community_cursor(cursor):
+    """Parse a feed cursor into a post id; raises ValueError if malformed or out of range"""
+    post_id = int(cursor)
+    # Larger values overflow SQLite's 64-bit integers when bound
+    if not 1 <= post_id <= 2 ** 63 - 1:
+        raise ValueError(f'Cursor out of range: {cursor}')
+    return post_id
+
+def community_page(before=None, limit=None, category=None):
+    """One page of the feed, newest first, as (serialized posts, next_cursor); raises ValueError for a bad cursor"""
+    limit = limit or app.config['COMMUNITY_PAGE_SIZE']
+    query = CommunityPost.query.options(db.joinedload(CommunityPost.author))
+    if category:
+        query = query.filter(CommunityPost.category == category)
+    if before:
+        query = query.filter(CommunityPost.id < decode_community_cursor(before))
+
+    # Fetch one extra row to know whether another page exists
+    posts = query.order_by(CommunityPost.id.desc()).limit(limit + 1).all()
+    next_cursor = str(posts[limit - 1].id) if len(posts) > limit else None
+    return [serialize_post(post) for post in posts[:limit]], next_cursor
+
+def community_stats():
+    """Member, post and activity numbers plus the month's top contributors, straight from SQL"""
+    now = datetime.utcnow()
+    midnight = datetime.combine(now.date(), datetime.min.time())
+    recent = now - timedelta(minutes=15)
+    active = db.union(
+        db.select(CommunityPost.user_id).where(CommunityPost.created_at >= recent),
+        db.select(PostReaction.user_id).where(PostReaction.created_at >= recent)
+    ).subquery()
     stats = {
-        'total_entries': total_entries,
-        'current_streak': streak,
-        'most_common_mood': most_common_mood.title(),
-        'days_active': days_active
-    }
-    
-    # Prepare chart data
-    chart_dates = []
-    chart_moods = []
-    chart_activity = []
-    
-    # Sort for chart (oldest to newest)
-    for p in sorted(progress_data, key=lambda x: x.date):
-        chart_dates.append(p.date.strftime('%b %d'))
-        chart_moods.append(p.mood_score or 0)
-        chart_activity.append(p.activity_score or 0)
-        
-    chart_data = {
-        'labels': chart_dates,
-        'moods': chart_moods,
-        'activity': chart_activity
+        'total_members': get_counter(USER_COUNTER),
+        'posts_today': CommunityPost.query.filter(CommunityPost.created_at >= midnight).count(),
+        'active_now': db.session.query(db.func.count()).select_from(active).scalar(),
+        'success_stories': CommunityPost.query.filter(CommunityPost.category == 'success').count()
     }
-    
-    return render_template('dashboard.html', 
-                         entries=recent_entries,
-                         progress=progress_data,
-                         affirmation=daily_affirmation,
-                         stats=stats,
-                         chart_data=chart_data)
+    contributors = db.session.query(User.username, db.func.count(CommunityPost.id), db.func.sum(CommunityPost.hearts))\
+        .join(CommunityPost, CommunityPost.user_id == User.id)\
+        .filter(CommunityPost.created_at >= now - timedelta(days=30))\
+        .group_by(User.id, User.username)\
+        .order_by(db.func.sum(CommunityPost.hearts).desc(), db.func.count(CommunityPost.id).desc())\
+        .limit(5).all()
+    top_contributors = [{'name': name, 'posts': posts, 'hearts': hearts} for name, posts, hearts in contributors]
+    return stats, top_contributors
 
-@app.route('/analyze', methods=['POST'])
-def analyze():
-    """Main analysis endpoint with dynamic suggestions"""
-    if not current_user.is_authenticated:
-        return jsonify({'error': 'Not authenticated'}), 401
+def get_community_snapshot():
+    """First feed page and sidebar numbers, rebuilt per worker after a new post or COMMUNITY_FEED_TTL seconds"""
+    global _COMMUNITY_SNAPSHOT
+    version = get_counter(COMMUNITY_POST_COUNTER)
 
-    data = request.get_json()
-    user_input = data.get('text', '')
-    mood = analyze_mood(user_input)
-    
-    # Context-aware suggestions based on mood
-    suggestions = {
-        'improving': [
-            'Celebrate this win - write down 3 things you did well',
-            'Share your positivity with a friend or in the community',
-            'Set a new goal while you are feeling strong'
-        ],
-        'struggling': [
-            'Be gentle with yourself, healing is non-linear',
-            'Try the 5-minute box breathing exercise now',
-            'Write a letter to yourself offering compassion'
-        ],
-        'neutral': [
-            'Take a moment to identify one small joy today',
-            'Go for a short walk to clear your mind',
-            'Practice mindfulness for 5 minutes'
-        ],
-        'crisis': [
-            'Please reach out for help immediately - you are not alone.',
-            'Call Vandrevala Foundation (India): 1860-266-2345 (24/7)',
-            'Call iCall Helpline: 9152987821 (Mon-Sat, 8 AM - 10 PM)'
-        ]
-    }
-    
-    # Update user's recovery stage if significant
-    if mood != 'neutral' and mood != 'crisis':
-        current_user.recovery_stage = mood
+    def fresh(snapshot):
+        return snapshot is not None and snapshot['version'] == version and time.monotonic() < snapshot['expires']
+
+    snapshot = _COMMUNITY_SNAPSHOT
+    if fresh(snapshot):
+        return snapshot
+
+    # One thread rebuilds; the others keep serving the previous snapshot meanwhile
+    if snapshot is not None and not _COMMUNITY_SNAPSHOT_LOCK.acquire(blocking=False):
+        return snapshot
+    if snapshot is None:
+        # Nothing to serve yet: return our pooled connection so waiting readers can't starve the rebuild
+        db.session.rollback()
+        _COMMUNITY_SNAPSHOT_LOCK.acquire()
+    try:
+        if fresh(_COMMUNITY_SNAPSHOT):
+            return _COMMUNITY_SNAPSHOT
+        posts, next_cursor = community_page()
+        stats, top_contributors = community_stats()
+        _COMMUNITY_SNAPSHOT = snapshot = {
+            'version': version,
+            'expires': time.monotonic() + app.config['COMMUNITY_FEED_TTL'],
+            'posts': posts,
+            'next_cursor': next_cursor,
+            'stats': stats,
+            'top_contributors': top_contributors
+        }
+    finally:
+        _COMMUNITY_SNAPSHOT_LOCK.release()
+    return snapshot
+
+def invalidate_community_snapshot():
+    """Drop this worker's snapshot; other workers notice the bumped post counter"""
+    global _COMMUNITY_SNAPSHOT
+    _COMMUNITY_SNAPSHOT = None
+
+def apply_reactions(batch):
+    """Write {(post_id, user_id, kind): reacted} and the matching counter changes; the caller commits"""
+    keys = list(batch)
+    existing = set()
+    for start in range(0, len(keys), 300):
+        existing.update(db.session.query(PostReaction.post_id, PostReaction.user_id, PostReaction.kind).filter(
+            db.tuple_(PostReaction.post_id, PostReaction.user_id, PostReaction.kind).in_(keys[start:start + 300])
+        ).all())
+    added = [key for key, reacted in batch.items() if reacted and key not in existing]
+    removed = [key for key, reacted in batch.items() if not reacted and key in existing]
+
+    table = PostReaction.__table__
+    if added:
+        db.session.execute(table.insert(), [
+            {'post_id': post_id, 'user_id': user_id, 'kind': kind, 'created_at': datetime.utcnow()}
+            for post_id, user_id, kind in added
+        ])
+    if removed:
+        db.session.execute(
+            table.delete().where(table.c.post_id == db.bindparam('p'), table.c.user_id == db.bindparam('u'),
+                                 table.c.kind == db.bindparam('k')),
+            [{'p': post_id, 'u': user_id, 'k': kind} for post_id, user_id, kind in removed]
+        )
+
+    # One UPDATE per post however many clicks it got
+    deltas = {}
+    for keys, step in ((added, 1), (removed, -1)):
+        for post_id, _, kind in keys:
+            delta = deltas.setdefault(post_id, {'hearts': 0, 'hugs': 0})
+            delta[REACTION_COUNTERS[kind]] += step
+    if deltas:
+        posts = CommunityPost.__table__
+        db.session.execute(
+            posts.update().where(posts.c.id == db.bindparam('post_id'))
+            .values(hearts=posts.c.hearts + db.bindparam('d_hearts'), hugs=posts.c.hugs + db.bindparam('d_hugs')),
+            [{'post_id': post_id, 'd_hearts': delta['hearts'], 'd_hugs': delta['hugs']}
+             for post_id, delta in deltas.items()]
+        )
+    return len(added), len(removed)
+
+class ReactionBuffer:
+    """Per-worker hearts and hugs, merged in memory and written every flush_interval in one transaction"""
+
+    def __init__(self, flush_interval):
+        self.flush_interval = flush_interval
+        self.pending = {}  # (post_id, user_id, kind) -> reacted; the last click wins
+        self.closed = False
+        self.condition = threading.Condition()
+        self.thread = None
+        self.pid = None
+
+    def submit(self, post_id, user_id, kind, reacted):
+        """Record that a user set or cleared a reaction"""
+        with self.condition:
+            if self.closed:
+                self.write({(post_id, user_id, kind): reacted})
+                return
+            # A thread started before a gunicorn fork does not exist in the worker
+            if self.thread is None or self.pid != os.getpid():
+                self.thread = threading.Thread(target=self.run, name='reaction-writer', daemon=True)
+                self.thread.start()
+                self.pid = os.getpid()
+            self.pending[(post_id, user_id, kind)] = reacted
+
+    def pending_for(self, user_id, post_ids):
+        """Unwritten reactions of a user on the given posts, as {(post_id, kind): reacted}"""
+        post_ids = set(post_ids)
+        with self.condition:
+            return {(post_id, kind): reacted for (post_id, owner, kind), reacted in self.pending.items()
+                    if owner == user_id and post_id in post_ids}
+
+    def run(self):
+        """Writer thread: flush whatever accumulated every flush_interval seconds"""
+        while True:
+            with self.condition:
+                if not self.closed:
+                    self.condition.wait(self.flush_interval)
+                batch, self.pending = self.pending, {}
+                closed = self.closed
+            if batch:
+                self.write(batch)
+            if closed:
+                return
+
+    def write(self, batch, retries=3):
+        """Apply a batch, retrying when another worker wrote one of the same reactions first"""
+        with app.app_context():
+            for _ in range(retries):
+                try:
+                    apply_reactions(batch)
+                    db.session.commit()
+                    return
+                except IntegrityError:
+                    # Re-read which reactions exist and try again
+                    db.session.rollback()
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception('Dropped %s community reactions', len(batch))
+                    return
+            app.logger.error('Dropped %s community reactions after %s conflicting attempts', len(batch), retries)
+
+    def close(self):
+        """Flush whatever is queued and stop the writer thread"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+            thread = self.thread if self.pid == os.getpid() else None
+        if thread is not None:
+            thread.join()
+
+REACTIONS = ReactionBuffer(flush_interval=app.config['COMMUNITY_REACTION_FLUSH_MS'] / 1000)
+atexit.register(REACTIONS.close)
+
+def user_reactions(user_id, post_ids):
+    """{post_id: set of kinds} the user has reacted with, including reactions not written yet"""
+    reactions = {}
+    if post_ids:
+        rows = db.session.query(PostReaction.post_id, PostReaction.kind)\
+            .filter(PostReaction.user_id == user_id, PostReaction.post_id.in_(post_ids))
+        for post_id, kind in rows:
+            reactions.setdefault(post_id, set()).add(kind)
+    for (post_id, kind), reacted in REACTIONS.pending_for(user_id, post_ids).items():
+        if reacted:
+            reactions.setdefault(post_id, set()).add(kind)
+        else:
+            reactions.get(post_id, set()).discard(kind)
+    return reactions
+
+# ------------------------------
+# Page Cache
+# ------------------------------
+# Newest source or template change, so every worker of a deploy agrees on Last-Modified
+DEPLOYED_AT = datetime.fromtimestamp(int(max(
+    os.path.getmtime(path) for path in [__file__, *Path(app.root_path, 'templates').glob('*.html')]
+)), timezone.utc)
+
+# Rendered pages per endpoint: {'day', 'body', 'etag', 'last_modified'}
+_PAGE_CACHE = {}
+
+# Set while the session holds flash messages, so cached pages can tell without opening
+# the session (which would send Vary: Cookie and keep them out of shared caches)
+FLASH_MARKER_COOKIE = 'pending_flashes'
+
+class PublicResponseSessionInterface(SecureCookieSessionInterface):
+    """Cookie sessions that leave public responses uncookied and without Vary: Cookie"""
+
+    def save_session(self, app, session, response):
+        # Hooks such as Flask-Login's remember-me check read the session on every request,
+        # which would otherwise add Vary: Cookie and keep public pages out of shared caches
+        if response.cache_control.public and not session.modified:
+            return
+        super().save_session(app, session, response)
+
+app.session_interface = PublicResponseSessionInterface()
+
+@app.after_request
+def mark_pending_flashes(response):
+    """Keep the flash marker cookie in step with the session's queued flash messages"""
+    # Reading .modified doesn't count as accessing the session
+    if session.modified:
+        if session.get('_flashes'):
+            response.set_cookie(FLASH_MARKER_COOKIE, '1', secure=app.config['SESSION_COOKIE_SECURE'],
+                                httponly=True, samesite='Lax')
+        elif FLASH_MARKER_COOKIE in request.cookies:
+            response.delete_cookie(FLASH_MARKER_COOKIE, secure=app.config['SESSION_COOKIE_SECURE'],
+                                   httponly=True, samesite='Lax')
+    return response
+
+def cached_page(daily=False):
+    """Render a GET page once per deploy (or once per day) and serve it with ETag, Last-Modified and 304s"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Flash messages belong to one visitor, so those requests render normally
+            if request.method not in ('GET', 'HEAD') or FLASH_MARKER_COOKIE in request.cookies:
+                return view(*args, **kwargs)
+
+            day = datetime.now().date() if daily else None
+            page = _PAGE_CACHE.get(request.endpoint)
+            if page is None or page['day'] != day:
+                body = view(*args, **kwargs)
+                if session.modified:
+                    # Rendering consumed flashes queued without the marker; don't share them
+                    return body
+                body = body.encode()
+                last_modified = DEPLOYED_AT
+                if daily:
+                    last_modified = max(last_modified, datetime.combine(day, datetime.min.time()).astimezone(timezone.utc))
+                page = {
+                    'day': day,
+                    'body': body,
+                    'etag': hashlib.sha256(body).hexdigest()[:32],
+                    'last_modified': last_modified
+                }
+                _PAGE_CACHE[request.endpoint] = page
+
+            max_age = app.config['PAGE_CACHE_MAX_AGE']
+            if daily:
+                # Don't let caches keep yesterday's date past midnight
+                midnight = datetime.combine(day + timedelta(days=1), datetime.min.time())
+                max_age = min(max_age, int((midnight - datetime.now()).total_seconds()))
+
+            response = Response(page['body'], mimetype='text/html')
+            response.set_etag(page['etag'])
+            response.last_modified = page['last_modified']
+            response.cache_control.public = True
+            response.cache_control.max_age = max_age
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
+
+# ------------------------------
+# Plan Results
+# ------------------------------
+def save_plan_result(user_id, plan_type, responses, result=None):
+    """Store generated responses server-side and point the session at them"""
+    if result is None:
+        result = PlanResult(id=secrets.token_urlsafe(8), user_id=user_id, plan_type=plan_type)
+        db.session.add(result)
+
+        # Purge results past their TTL while we are writing anyway
+        cutoff = datetime.utcnow() - timedelta(days=app.config['PLAN_RESULT_TTL_DAYS'])
+        PlanResult.query.filter(PlanResult.created_at < cutoff).delete(synchronize_session=False)
+        session['last_result_id'] = result.id
+    result.responses = json.dumps(responses)
+    db.session.commit()
+    return result
+
+# ------------------------------
+# Rate Limiting
+# ------------------------------
+RATE_LIMIT_KEYWORDS = [
+    'rate', 'limit', 'quota', 'exceeded', 'ratelimit',
+    'tokens per day', 'tpd', '429'
+]
+
+RETRY_AFTER_PATTERN = re.compile(
+    r'(?:try again in|retry[- ]after:?)\s*((?:[\d.]+h)?(?:[\d.]+m(?!s))?(?:[\d.]+s)?(?:[\d.]+ms)?)',
+    re.IGNORECASE
+)
+
+def is_rate_limit_error(error):
+    """Check whether an error message looks like a provider rate/quota limit"""
+    error_str = (error or '').lower()
+    return 'timeout' not in error_str and any(keyword in error_str for keyword in RATE_LIMIT_KEYWORDS)
+
+def parse_retry_after(error):
+    """Seconds until the provider resets, from messages like 'Please try again in 1m45.408s'"""
+    match = RETRY_AFTER_PATTERN.search(error or '')
+    if not match or not match.group(1):
+        return None
+
+    seconds = 0.0
+    for value, unit in re.findall(r'([\d.]+)(ms|h|m|s)', match.group(1)):
+        seconds += float(value) * {'h': 3600, 'm': 60, 's': 1, 'ms': 0.001}[unit]
+    return seconds
+
+def update_rate_limit_state(mutate, retries=5):
+    """Apply mutate(values, now) to the shared rate-limit row, refilling buckets first.
+
+    The row is updated with a version check so concurrent workers never
+    lose each other's writes; a conflicting update is simply retried.
+    """
+    table = RateLimitState.__table__
+    rpm = app.config['GROQ_REQUESTS_PER_MINUTE']
+    tpd = app.config['GROQ_TOKENS_PER_DAY']
+
+    for _ in range(retries):
+        now = datetime.utcnow()
+        row = db.session.execute(db.select(table).where(table.c.name == 'groq')).first()
+        if row is None:
+            try:
+                db.session.execute(table.insert().values(
+                    name='groq', version=0, request_tokens=rpm, daily_tokens=tpd, updated_at=now
+                ))
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+            continue
+
+        elapsed = max((now - row.updated_at).total_seconds(), 0)
+        values = {
+            'request_tokens': min(rpm, row.request_tokens + elapsed * rpm / 60),
+            'daily_tokens': min(tpd, row.daily_tokens + elapsed * tpd / 86400),
+            'blocked_until': row.blocked_until
+        }
+        result = mutate(values, now)
+
+        updated = db.session.execute(
+            table.update()
+            .where(table.c.name == 'groq', table.c.version == row.version)
+            .values(version=row.version + 1, updated_at=now, **values)
+        ).rowcount
         db.session.commit()
-    
-    return jsonify({
-        'mood': mood if mood != 'crisis' else 'Support Needed',
-        'message': 'Analysis complete',
-        'next_steps': suggestions.get(mood, suggestions['neutral'])
-    })
+        if updated:
+            return result
+    return None
 
-@app.route('/generate_plan', methods=['GET', 'POST'])
-def generate_plan():
-    """Generate recovery plan with AI - optimized for speed"""
-    global RATE_LIMITED, RATE_LIMIT_RESET_TIME
-    
-    # Ensure user is available for context if needed
-    if not current_user.is_authenticated:
-        return redirect(url_for('index'))
+def llm_blocked():
+    """True while the provider has told us to back off"""
+    table = RateLimitState.__table__
+    blocked_until = db.session.execute(
+        db.select(table.c.blocked_until).where(table.c.name == 'groq')
+    ).scalar()
+    return blocked_until is not None and datetime.utcnow() < blocked_until
 
-    user_input = request.form.get('user_input', '')
-    plan_type = request.form.get('plan_type', '7day')
-    
-    if not user_input:
-        flash('Please describe your situation', 'error')
-        return redirect(url_for('index'))
-    
-    groq_key = app.config['GROQ_API_KEY']
-    if not groq_key:
-        flash('API key not configured', 'error')
-        return redirect(url_for('index'))
-    
-    # Fallback responses for when API is rate-limited
-    def get_fallback_responses(situation_text, plan_duration):
-        return {
-            'therapist': f"""I understand you're going through a difficult time. Based on what you've shared, here are some compassionate insights:
+def acquire_llm_budget(calls):
+    """Reserve request and token budget for `calls` agent calls; False means use the fallback"""
+    needed_tokens = calls * app.config['GROQ_TOKENS_PER_CALL']
+
+    def take(values, now):
+        if values['blocked_until'] and now < values['blocked_until']:
+            return False
+        if values['request_tokens'] < calls or values['daily_tokens'] < needed_tokens:
+            return False
+        values['request_tokens'] -= calls
+        values['daily_tokens'] -= needed_tokens
+        return True
+
+    return bool(update_rate_limit_state(take))
+
+def record_rate_limit(error):
+    """Block LLM calls for every worker until the provider's reset time"""
+    retry_after = parse_retry_after(error) or app.config['RATE_LIMIT_DEFAULT_BACKOFF']
+    daily = any(keyword in error.lower() for keyword in ('tokens per day', 'tpd'))
+
+    def block(values, now):
+        blocked_until = now + timedelta(seconds=retry_after)
+        if values['blocked_until'] is None or values['blocked_until'] < blocked_until:
+            values['blocked_until'] = blocked_until
+        if daily:
+            # The daily quota is gone; let the bucket refill from empty
+            values['daily_tokens'] = 0
+
+    update_rate_limit_state(block)
+
+def error_payload_message(content):
+    """Message from a JSON error payload returned as agent content"""
+    try:
+        error = json.loads(content).get('error', {})
+        return error.get('message', '') if isinstance(error, dict) else str(error)
+    except (json.JSONDecodeError, ValueError, AttributeError):
+        return ''
+
+# ------------------------------
+# Metrics
+# ------------------------------
+# Prometheus metrics; with PROMETHEUS_MULTIPROC_DIR set, each gunicorn worker writes
+# its samples there and /metrics sums them (see gunicorn.conf.py)
+LLM_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 16, 32, 64)
+
+REQUEST_LATENCY = Histogram(
+    'healing_request_duration_seconds', 'Time until the response body was fully sent',
+    ['endpoint', 'method']
+)
+REQUESTS = Counter('healing_requests_total', 'Responses by status code', ['endpoint', 'method', 'status'])
+REQUEST_QUERIES = Histogram(
+    'healing_request_sql_queries', 'SQL statements executed per request', ['endpoint'],
+    buckets=(0, 1, 2, 4, 8, 16, 32, 64, 128)
+)
+REQUEST_SQL_TIME = Histogram('healing_request_sql_seconds', 'Time spent in SQL per request', ['endpoint'])
+LLM_LATENCY = Histogram(
+    'healing_llm_call_duration_seconds', 'Agent call latency', ['agent', 'outcome'], buckets=LLM_BUCKETS
+)
+LLM_ERRORS = Counter('healing_llm_errors_total', 'Failed agent calls by error class', ['agent', 'error'])
+LLM_FALLBACKS = Counter('healing_llm_fallbacks_total', 'Sections answered with fallback text', ['agent', 'reason'])
+
+class RequestMetricsMiddleware:
+    """WSGI middleware timing each request until its body is fully sent, streams included"""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        started = time.perf_counter()
+        stats = environ['healing.metrics'] = {'endpoint': 'unmatched', 'status': '500', 'queries': 0, 'sql_seconds': 0.0}
+
+        def capture_status(status, headers, exc_info=None):
+            stats['status'] = status.split(' ', 1)[0]
+            return start_response(status, headers, exc_info)
+
+        def observe():
+            endpoint = stats['endpoint']
+            method = environ.get('REQUEST_METHOD', 'GET')
+            REQUEST_LATENCY.labels(endpoint, method).observe(time.perf_counter() - started)
+            REQUESTS.labels(endpoint, method, stats['status']).inc()
+            REQUEST_QUERIES.labels(endpoint).observe(stats['queries'])
+            REQUEST_SQL_TIME.labels(endpoint).observe(stats['sql_seconds'])
+
+        return ClosingIterator(self.wsgi_app(environ, capture_status), observe)
+
+app.wsgi_app = RequestMetricsMiddleware(app.wsgi_app)
+
+@app.before_request
+def label_request_metrics():
+    stats = request.environ.get('healing.metrics')
+    if stats is not None and request.endpoint:
+        stats['endpoint'] = request.endpoint
+
+# The start time lives on the execution context, so a failed statement (which never
+# reaches after_cursor_execute) leaves nothing behind on the pooled connection
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def record_query_time(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started
+    stats = request.environ.get('healing.metrics') if has_request_context() else None
+    if stats is not None:
+        stats['queries'] += 1
+        stats['sql_seconds'] += elapsed
+
+def llm_error_class(error, exception=None):
+    """Low-cardinality label for a failed agent call"""
+    if error == 'timeout':
+        return 'timeout'
+    if is_rate_limit_error(error):
+        return 'rate_limit'
+    return type(exception).__name__ if exception is not None else 'provider_error'
+
+def record_llm_call(agent_name, started, error=None, exception=None):
+    """Observe one finished agent call"""
+    LLM_LATENCY.labels(agent_name, 'error' if error else 'ok').observe(time.perf_counter() - started)
+    if error:
+        LLM_ERRORS.labels(agent_name, llm_error_class(error, exception)).inc()
+
+class LLMCall:
+    """One agent call's metrics, recorded once even if the caller stops waiting for it"""
+
+    def __init__(self, agent_name):
+        self.agent_name = agent_name
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+        self.recorded = False
+
+    def record(self, error=None, exception=None):
+        """Observe the outcome, unless a timeout was already recorded for this call"""
+        with self.lock:
+            if self.recorded:
+                return
+            self.recorded = True
+        record_llm_call(self.agent_name, self.started, error, exception)
+
+def record_fallback(agent_names, reason):
+    """Count sections that were answered with fallback text"""
+    for agent_name in agent_names:
+        LLM_FALLBACKS.labels(agent_name, reason).inc()
+
+# ------------------------------
+# Agent Execution
+# ------------------------------
+def call_agent(agent_name, agent, prompt, call):
+    """Run a single agent, recording its latency and any error class on its LLMCall"""
+    call.started = time.perf_counter()
+    agent_name, content, error, exception = run_agent(agent_name, agent, prompt)
+    call.record(error, exception)
+    return agent_name, content, error
+
+def run_agent(agent_name, agent, prompt):
+    """Run a single agent and parse provider error payloads out of its output"""
+    try:
+        result = agent.run(prompt)
+
+        # Check if result.content is a JSON error
+        content = result.content
+        if isinstance(content, str):
+            # Try to parse as JSON to detect error responses
+            try:
+                parsed = json.loads(content)
+                if isinstance(parsed, dict) and 'error' in parsed:
+                    # This is an error response
+                    error_msg = parsed.get('error', {}).get('message', '')
+                    return agent_name, None, error_msg, None
+            except (json.JSONDecodeError, ValueError):
+                # Not JSON, it's actual content
+                pass
+
+        return agent_name, content, None, None
+    except Exception as e:
+        error_str = str(e)
+        # Try to extract error from exception message if it contains JSON
+        try:
+            if '{' in error_str and 'error' in error_str:
+                # Extract JSON from error string
+                start = error_str.find('{')
+                end = error_str.rfind('}') + 1
+                if start != -1 and end > start:
+                    json_str = error_str[start:end]
+                    parsed = json.loads(json_str)
+                    if 'error' in parsed:
+                        error_msg = parsed['error'].get('message', error_str)
+                        return agent_name, None, error_msg, e
+        except:
+            pass
+        return agent_name, None, error_str, e
+
+def run_agents(agents_config, timeout=None):
+    """Run agents on the shared executor and collect (content, error) per agent name.
+
+    In fan-out mode every agent is dispatched at once and the whole batch
+    shares a single deadline, so latency is bounded by the slowest agent
+    rather than the sum. Agents that miss the deadline report "timeout".
+    """
+    if timeout is None:
+        timeout = app.config['AGENT_TIMEOUT']
+
+    results = {}
+    # A call abandoned at the deadline is recorded as a timeout here; whatever it
+    # returns later is dropped rather than counted a second time
+    calls = {agent_name: LLMCall(agent_name) for agent_name, _, _ in agents_config}
+    if app.config['AGENT_FANOUT']:
+        futures = {
+            AGENT_EXECUTOR.submit(call_agent, agent_name, agent, prompt, calls[agent_name]): agent_name
+            for agent_name, agent, prompt in agents_config
+        }
+        done, not_done = concurrent.futures.wait(futures, timeout=timeout)
+        for future in done:
+            _, content, error = future.result()
+            results[futures[future]] = (content, error)
+        for future in not_done:
+            future.cancel()
+            results[futures[future]] = (None, 'timeout')
+            calls[futures[future]].record('timeout')
+    else:
+        for agent_name, agent, prompt in agents_config:
+            future = AGENT_EXECUTOR.submit(call_agent, agent_name, agent, prompt, calls[agent_name])
+            try:
+                _, content, error = future.result(timeout=timeout)
+                results[agent_name] = (content, error)
+            except concurrent.futures.TimeoutError:
+                results[agent_name] = (None, 'timeout')
+                calls[agent_name].record('timeout')
+
+    # Preserve the order in which agents were configured
+    return {agent_name: results[agent_name] for agent_name, _, _ in agents_config}
+
+def is_error_payload(content):
+    """Check whether agent output is actually a JSON error from the provider"""
+    if isinstance(content, str) and content.strip().startswith('{'):
+        try:
+            parsed = json.loads(content)
+            return isinstance(parsed, dict) and 'error' in parsed
+        except (json.JSONDecodeError, ValueError):
+            pass
+    return False
+
+def stream_agent(agent_name, agent, prompt, out, call):
+    """Run an agent in streaming mode, pushing (agent_name, kind, payload) onto a queue"""
+    call.started = time.perf_counter()
+    try:
+        for event in agent.run(prompt, stream=True):
+            if call.recorded:
+                # The stream already gave up on this agent; stop reading so the thread is freed
+                return
+            event_type = getattr(event, 'event', None)
+            if event_type == 'RunContent' and isinstance(event.content, str) and event.content:
+                out.put((agent_name, 'token', event.content))
+            elif event_type == 'RunError':
+                call.record(str(event.content) or 'provider_error')
+                out.put((agent_name, 'error', str(event.content)))
+                return
+        call.record()
+        out.put((agent_name, 'end', None))
+    except Exception as e:
+        call.record(str(e), e)
+        out.put((agent_name, 'error', str(e)))
+
+def split_markdown_blocks(buffer):
+    """Split a streaming markdown buffer into (complete blocks, pending tail)
+
+    Blocks end at a blank line. A cut inside an open fenced code block is
+    deferred until the fence closes so it is rendered in one piece.
+    """
+    cut = buffer.rfind('\n\n')
+    while cut != -1 and buffer.count('```', 0, cut) % 2:
+        cut = buffer.rfind('\n\n', 0, cut)
+    if cut == -1:
+        return '', buffer
+    return buffer[:cut], buffer[cut + 2:]
+
+def sse_event(event, data):
+    """Format a server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def get_fallback_responses(situation_text, plan_duration):
+    """Fallback responses for when API is rate-limited"""
+    return {
+        'therapist': f"""I understand you're going through a difficult time. Based on what you've shared, here are some compassionate insights:
 
 **Validation of Your Feelings:**
 Your emotions are completely valid. Breakups and emotional challenges are among life's most difficult experiences, and it's okay to feel overwhelmed.
@@ -392,8 +1695,8 @@ Your emotions are completely valid. Breakups and emotional challenges are among
 **Remember:** You are stronger than you think, and this pain is temporary. Every day you get through is a step forward in your healing journey.
 
 *If you're experiencing severe distress, please reach out to a mental health professional or call a helpline.*""",
-            
-            'planner': f"""**Your {plan_duration.upper()} Recovery Action Plan**
+        
+        'planner': f"""**Your {plan_duration.upper()} Recovery Action Plan**
 
 **Week 1: Foundation & Self-Care**
 - Day 1-2: Allow yourself to feel and process emotions
@@ -428,8 +1731,8 @@ You'll know you're healing when:
 - You feel more like yourself
 
 *Adjust this plan to your pace. Healing isn't a race.*""",
-            
-            'closure': f"""**Finding Closure & Letting Go**
+        
+        'closure': f"""**Finding Closure & Letting Go**
 
 Closure is something you give yourself, not something you receive from others. Here's how to create it:
 
@@ -469,8 +1772,8 @@ Try: "What can I learn from this experience?"
 "I am complete on my own. I honor what was, I accept what is, and I embrace what will be."
 
 *Closure is a journey, not a destination. Be patient with yourself.*""",
-            
-            'honesty': f"""**Reality Check: The Honest Truth You Need**
+        
+        'honesty': f"""**Reality Check: The Honest Truth You Need**
 
 Let's be real for a moment, because sometimes we need tough love:
 
@@ -494,170 +1797,471 @@ Let's be real for a moment, because sometimes we need tough love:
 - Begging or pleading will NEVER work - it only pushes them further away
 - You cannot "fix" this by being perfect - it's over, and that's final
 
-**But Here's the GOOD News:**
-- You're wasting energy on someone who doesn't want you when you could be finding someone who does
-- Every day you spend healing is a day closer to being happy again
-- You WILL love again, and it will be better because you'll know what you deserve
+**But Here's the GOOD News:**
+- You're wasting energy on someone who doesn't want you when you could be finding someone who does
+- Every day you spend healing is a day closer to being happy again
+- You WILL love again, and it will be better because you'll know what you deserve
+
+**Your Action Plan:**
+1. Block/delete them TODAY
+2. Tell your friends to stop updating you about them
+3. Focus on YOU - gym, hobbies, career, friends
+4. Give yourself 90 days of strict no contact
+5. Watch how much better you feel
+
+**Bottom Line:**
+You deserve someone who chooses you every single day without hesitation. This person didn't. So stop choosing them. Choose yourself instead.
+
+*This might sting now, but future you will thank you for reading this.*"""
+    }
+
+# ------------------------------
+# Routes
+# ------------------------------
+# ------------------------------
+# Routes
+# ------------------------------
+@app.route('/')
+def index():
+    """Home page with modern 2026 design"""
+    # Auto-login a guest user for demo purposes if not logged in
+    if not current_user.is_authenticated:
+        login_user(get_guest_user())
+    
+    return render_template('index.html', stats=get_homepage_stats())
+
+# Login/Register routes removed as per request to simplify access
+
+@app.route('/dashboard')
+# @login_required - removed for easier access
+def dashboard():
+    """User dashboard with progress tracking"""
+    # Ensure user is logged in (auto-login logic in index handles entry, but safety here)
+    if not current_user.is_authenticated:
+        return redirect(url_for('index'))
+        
+    recent_entries = JournalEntry.query.filter_by(user_id=current_user.id)\
+        .order_by(JournalEntry.created_at.desc()).limit(5).all()
+    
+    # Last 7 days with entries, one point per day however many entries it had
+    progress_data = ProgressRollup.query.filter_by(user_id=current_user.id, bucket='day')\
+        .order_by(ProgressRollup.period_start.desc()).limit(7).all()
+    
+    # Calculate dynamic stats from the incrementally maintained stats row
+    user_stats = get_user_stats(current_user.id)
+    
+    # Streak only counts if it reaches today
+    streak = user_stats.streak if user_stats.last_entry_date == datetime.utcnow().date() else 0
+    
+    # Days since start
+    days_active = 0
+    if user_stats.first_entry_at:
+        days_active = (datetime.now() - user_stats.first_entry_at).days + 1
+    
+    affirmations = [
+        "I am worthy of love and respect, especially from myself.",
+        "Healing is a journey, and I am taking it one day at a time.",
+        "My past does not define my future; I am growing every day.",
+        "I choose to let go of what I cannot control.",
+        "I am resilient, strong, and capable of overcoming this.",
+        "Self-love is the greatest middle finger of all time.",
+        "It's okay to not be okay, as long as I keep moving forward.",
+        "I deserve a life of peace and happiness.",
+        "My feelings are valid, but they do not control me.",
+        "Every end is a new beginning in disguise."
+    ]
+    import random
+    daily_affirmation = random.choice(affirmations)
+    
+    stats = {
+        'total_entries': user_stats.total_entries,
+        'current_streak': streak,
+        'most_common_mood': most_common_mood(current_user.id).title(),
+        'days_active': days_active
+    }
+    
+    # Prepare chart data
+    chart_dates = []
+    chart_moods = []
+    chart_activity = []
+    
+    # Sort for chart (oldest to newest)
+    for p in sorted(progress_data, key=lambda x: x.period_start):
+        chart_dates.append(p.period_start.strftime('%b %d'))
+        chart_moods.append(round(p.mood_sum / p.count, 1))
+        chart_activity.append(round(p.activity_sum / p.count, 1))
+        
+    chart_data = {
+        'labels': chart_dates,
+        'moods': chart_moods,
+        'activity': chart_activity
+    }
+    
+    return render_template('dashboard.html', 
+                         entries=recent_entries,
+                         progress=progress_data,
+                         affirmation=daily_affirmation,
+                         stats=stats,
+                         chart_data=chart_data)
+
+@app.route('/analyze', methods=['POST'])
+def analyze():
+    """Main analysis endpoint with dynamic suggestions"""
+    if not current_user.is_authenticated:
+        return jsonify({'error': 'Not authenticated'}), 401
 
-**Your Action Plan:**
-1. Block/delete them TODAY
-2. Tell your friends to stop updating you about them
-3. Focus on YOU - gym, hobbies, career, friends
-4. Give yourself 90 days of strict no contact
-5. Watch how much better you feel
+    data = request.get_json()
+    user_input = data.get('text', '')
+    mood = analyze_mood(user_input)
+    
+    # Context-aware suggestions based on mood
+    suggestions = {
+        'improving': [
+            'Celebrate this win - write down 3 things you did well',
+            'Share your positivity with a friend or in the community',
+            'Set a new goal while you are feeling strong'
+        ],
+        'struggling': [
+            'Be gentle with yourself, healing is non-linear',
+            'Try the 5-minute box breathing exercise now',
+            'Write a letter to yourself offering compassion'
+        ],
+        'neutral': [
+            'Take a moment to identify one small joy today',
+            'Go for a short walk to clear your mind',
+            'Practice mindfulness for 5 minutes'
+        ],
+        'crisis': [
+            'Please reach out for help immediately - you are not alone.',
+            'Call Vandrevala Foundation (India): 1860-266-2345 (24/7)',
+            'Call iCall Helpline: 9152987821 (Mon-Sat, 8 AM - 10 PM)'
+        ]
+    }
+    
+    # Update user's recovery stage if significant
+    if mood != 'neutral' and mood != 'crisis':
+        current_user.recovery_stage = mood
+        db.session.commit()
+    
+    return jsonify({
+        'mood': mood if mood != 'crisis' else 'Support Needed',
+        'message': 'Analysis complete',
+        'next_steps': suggestions.get(mood, suggestions['neutral'])
+    })
 
-**Bottom Line:**
-You deserve someone who chooses you every single day without hesitation. This person didn't. So stop choosing them. Choose yourself instead.
+@app.route('/generate_plan', methods=['GET', 'POST'])
+def generate_plan():
+    """Generate recovery plan with AI - optimized for speed"""
+    # Ensure user is available for context if needed
+    if not current_user.is_authenticated:
+        return redirect(url_for('index'))
 
-*This might sting now, but future you will thank you for reading this.*"""
-        }
+    user_input = request.form.get('user_input', '')
+    plan_type = request.form.get('plan_type', '7day')
     
-    # Check if we're currently rate-limited and should skip API calls
-    if RATE_LIMITED and RATE_LIMIT_RESET_TIME:
-        if datetime.now() < RATE_LIMIT_RESET_TIME:
-            # Still rate-limited, use fallback immediately
-            flash('⚠️ AI service is temporarily at capacity. Showing expertly crafted recovery guidance.', 'info')
-            responses = get_fallback_responses(user_input, plan_type)
-            session['last_responses'] = responses
-            return render_template('results.html', responses=responses)
-        else:
-            # Reset time has passed, try API again
-            RATE_LIMITED = False
-            RATE_LIMIT_RESET_TIME = None
+    if not user_input:
+        flash('Please describe your situation', 'error')
+        return redirect(url_for('index'))
+    
+    groq_key = get_llm_api_key()
+    if not groq_key:
+        flash('API key not configured', 'error')
+        return redirect(url_for('index'))
+    
+    # Render the page shell right away and let the browser stream the answers in
+    if app.config['STREAM_RESULTS']:
+        return render_template('results.html', responses=None, stream=True,
+                               user_input=user_input, plan_type=plan_type)
     
     # Try API calls with timeout protection
     use_fallback = False
     
     try:
         # Quick test: try to create agents (this is fast)
-        therapist, closure, planner, honesty = create_agents(groq_key)
+        agents_config = plan_agents_config(groq_key, user_input, plan_type)
         
-        # Generate responses with individual error handling and timeouts
+        # Generate responses with individual error handling
         responses = {}
         fallback_data = get_fallback_responses(user_input, plan_type)
         
-        # Try each agent separately with timeout (3 seconds max per agent)
-        agents_config = [
-            ('therapist', therapist, f"Situation: {user_input}"),
-            ('planner', planner, f"Create a {plan_type} recovery plan for: {user_input}"),
-            ('closure', closure, f"Situation: {user_input}"),
-            ('honesty', honesty, f"Situation: {user_input}")
-        ]
+        # Serve repeat situations from the response cache, even while rate-limited
+        cache_keys = plan_cache_keys(agents_config, user_input, plan_type)
+        responses.update(get_cached_responses(cache_keys))
+        fresh_responses = {}
         
-        import concurrent.futures
-        import json as json_module
+        # Skip doomed API calls while rate-limited or when the shared budget is exhausted
+        uncached = [config for config in agents_config if config[0] not in responses]
+        if uncached:
+            if llm_blocked():
+                reason = 'rate_limited'
+            elif not acquire_llm_budget(len(uncached)):
+                reason = 'budget'
+            else:
+                reason = None
+            if reason:
+                for agent_name, _, _ in uncached:
+                    responses[agent_name] = fallback_data[agent_name]
+                record_fallback([config[0] for config in uncached], reason)
+                use_fallback = True
+                uncached = []
         
-        def call_agent_with_timeout(agent_name, agent, prompt, timeout=6):
-            """Call agent with timeout protection and error parsing"""
-            try:
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    future = executor.submit(agent.run, prompt)
-                    result = future.result(timeout=timeout)
-                    
-                    # Check if result.content is a JSON error
-                    content = result.content
-                    if isinstance(content, str):
-                        # Try to parse as JSON to detect error responses
-                        try:
-                            parsed = json_module.loads(content)
-                            if isinstance(parsed, dict) and 'error' in parsed:
-                                # This is an error response
-                                error_msg = parsed.get('error', {}).get('message', '')
-                                return agent_name, None, error_msg
-                        except (json_module.JSONDecodeError, ValueError):
-                            # Not JSON, it's actual content
-                            pass
-                    
-                    return agent_name, content, None
-            except concurrent.futures.TimeoutError:
-                return agent_name, None, "timeout"
-            except Exception as e:
-                error_str = str(e)
-                # Try to extract error from exception message if it contains JSON
-                try:
-                    if '{' in error_str and 'error' in error_str:
-                        # Extract JSON from error string
-                        start = error_str.find('{')
-                        end = error_str.rfind('}') + 1
-                        if start != -1 and end > start:
-                            json_str = error_str[start:end]
-                            parsed = json_module.loads(json_str)
-                            if 'error' in parsed:
-                                error_msg = parsed['error'].get('message', error_str)
-                                return agent_name, None, error_msg
-                except:
-                    pass
-                return agent_name, None, error_str
+        # Run the remaining agents under one overall deadline
+        agent_results = run_agents(uncached)
         
-        # Try all agents with timeout
-        for agent_name, agent, prompt in agents_config:
-            name, content, error = call_agent_with_timeout(agent_name, agent, prompt, timeout=6)
-            
+        for agent_name, (content, error) in agent_results.items():
             if content:
                 # Success! Validate it's not an error JSON
                 if isinstance(content, str) and content.strip().startswith('{'):
                     try:
-                        parsed = json_module.loads(content)
+                        parsed = json.loads(content)
                         if 'error' in parsed:
                             # This is actually an error, use fallback
                             responses[agent_name] = fallback_data[agent_name]
+                            record_fallback([agent_name], 'error')
                             use_fallback = True
-                            RATE_LIMITED = True
-                            RATE_LIMIT_RESET_TIME = datetime.now() + timedelta(hours=1)
+                            record_rate_limit(error_payload_message(content))
                             continue
                     except:
                         pass
                 
                 # Valid content
                 responses[agent_name] = content
+                fresh_responses[agent_name] = content
             else:
                 # Failed - check if it's a rate limit error
-                if error:
-                    error_str = error.lower()
-                    is_rate_limit = any(keyword in error_str for keyword in [
-                        'rate', 'limit', 'quota', 'exceeded', 'ratelimit', 
-                        'tokens per day', 'tpd', '429', 'timeout'
-                    ])
-                    
-                    if is_rate_limit and 'timeout' not in error_str:
-                        # Mark as rate-limited globally
-                        RATE_LIMITED = True
-                        RATE_LIMIT_RESET_TIME = datetime.now() + timedelta(hours=1)
+                if is_rate_limit_error(error):
+                    # Mark as rate-limited for every worker
+                    record_rate_limit(error)
                 
                 # Use fallback for this agent
                 responses[agent_name] = fallback_data[agent_name]
+                record_fallback([agent_name], 'timeout' if error == 'timeout' else 'error')
                 use_fallback = True
         
+        if cache_keys:
+            store_cached_responses(cache_keys, fresh_responses)
+        
         # Show info message if we used fallback
         if use_fallback:
             flash('⚠️ AI service is temporarily at capacity. Showing expertly crafted recovery guidance.', 'info')
         
-        # Save to session for display
-        session['last_responses'] = responses
-        
-        return render_template('results.html', responses=responses)
+        # Save server-side and show it at a stable URL
+        result = save_plan_result(current_user.id, plan_type, responses)
+        return redirect(url_for('view_results', result_id=result.id))
         
     except Exception as e:
         # If agent creation fails, use complete fallback immediately
-        print(f"Global error in generate_plan: {str(e)}") # Log for debugging
-        error_msg = str(e).lower()
-        is_rate_limit = any(keyword in error_msg for keyword in [
-            'rate', 'limit', 'quota', 'exceeded', 'ratelimit', 
-            'tokens per day', 'tpd', '429'
-        ])
+        app.logger.exception('Global error in generate_plan')
+        db.session.rollback()
         
-        if is_rate_limit:
-            # Mark as rate-limited globally
-            RATE_LIMITED = True
-            RATE_LIMIT_RESET_TIME = datetime.now() + timedelta(hours=1)
+        if is_rate_limit_error(str(e)):
+            # Mark as rate-limited for every worker
+            record_rate_limit(str(e))
             flash('⚠️ AI service has reached daily limit. Showing expertly crafted recovery guidance.', 'warning')
         else:
             # For connection errors or other issues
             flash('⚠️ Showing expertly crafted recovery guidance (AI connection unavailable).', 'info')
         
         responses = get_fallback_responses(user_input, plan_type)
-        session['last_responses'] = responses
-        return render_template('results.html', responses=responses)
+        record_fallback(responses, 'exception')
+        result = save_plan_result(current_user.id, plan_type, responses)
+        return redirect(url_for('view_results', result_id=result.id))
+
+@app.route('/generate_plan/stream', methods=['POST'])
+def generate_plan_stream():
+    """Stream each agent's answer to the browser as server-sent events"""
+    if not current_user.is_authenticated:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    user_input = request.form.get('user_input', '')
+    plan_type = request.form.get('plan_type', '7day')
+
+    if not user_input:
+        return jsonify({'error': 'Please describe your situation'}), 400
+
+    groq_key = get_llm_api_key()
+    if not groq_key:
+        return jsonify({'error': 'API key not configured'}), 503
+
+    fallback_data = get_fallback_responses(user_input, plan_type)
+    agent_names = ['therapist', 'planner', 'closure', 'honesty']
+    out = queue.Queue()
+    pending = set()
+    calls = {}
+    cache_keys = {}
+    cached = {}
+    setup_failed = False
+
+    # While rate-limited only the cache answers; every other section falls back
+    blocked = llm_blocked()
+    try:
+        agents_config = plan_agents_config(groq_key, user_input, plan_type)
+        cache_keys = plan_cache_keys(agents_config, user_input, plan_type)
+        cached = get_cached_responses(cache_keys)
+        uncached = [config for config in agents_config if config[0] not in cached]
+        if uncached and not blocked and acquire_llm_budget(len(uncached)):
+            for agent_name, agent, prompt in uncached:
+                calls[agent_name] = LLMCall(agent_name)
+                AGENT_EXECUTOR.submit(stream_agent, agent_name, agent, prompt, out, calls[agent_name])
+                pending.add(agent_name)
+    except Exception:
+        setup_failed = True
+        app.logger.exception('Global error in generate_plan_stream')
+
+    # Reserve the result id now; the session cookie can't change once streaming starts
+    user_id = current_user.id
+    result_id = save_plan_result(user_id, plan_type, {}).id
+    final = {}
+
+    # Why a section that never started falls back: blocked, out of budget, or setup failed
+    not_started_reason = 'exception' if setup_failed else 'rate_limited' if blocked else 'budget'
+
+    def fallback_event(agent_name, reason):
+        record_fallback([agent_name], reason)
+        final[agent_name] = fallback_data[agent_name]
+        return sse_event('fallback', {
+            'agent': agent_name,
+            'html': markdown_filter(fallback_data[agent_name])
+        })
+
+    def generate():
+        use_fallback = len(pending) + len(cached) < len(agent_names)
+        texts = {agent_name: '' for agent_name in agent_names}
+        buffers = dict(texts)
+
+        try:
+            yield sse_event('result', {'url': url_for('view_results', result_id=result_id)})
+
+            # Cached sections go out first; sections whose agent never started fall back
+            for agent_name in agent_names:
+                if agent_name in cached:
+                    final[agent_name] = cached[agent_name]
+                    yield sse_event('html', {
+                        'agent': agent_name,
+                        'html': markdown_filter(cached[agent_name]),
+                        'pending': ''
+                    })
+                    yield sse_event('done', {'agent': agent_name})
+                elif agent_name not in pending:
+                    yield fallback_event(agent_name, not_started_reason)
+
+            deadline = time.monotonic() + app.config['AGENT_STREAM_TIMEOUT']
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    agent_name, kind, payload = out.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+                if kind == 'token':
+                    texts[agent_name] += payload
+                    buffers[agent_name] += payload
+                    yield sse_event('token', {'agent': agent_name, 'text': payload})
+
+                    # Convert finished markdown blocks as soon as they are complete. Fragments
+                    # are never rendered twice, so they bypass the cache
+                    complete, buffers[agent_name] = split_markdown_blocks(buffers[agent_name])
+                    if complete:
+                        yield sse_event('html', {
+                            'agent': agent_name,
+                            'html': convert_markdown(complete),
+                            'pending': buffers[agent_name]
+                        })
+                    continue
+
+                pending.discard(agent_name)
+                content = texts[agent_name]
+                if kind == 'end' and content.strip() and not is_error_payload(content):
+                    # Blocks were rendered one at a time; render the whole answer once so loose
+                    # lists and continuation paragraphs come out as /results will show them
+                    yield sse_event('complete', {'agent': agent_name, 'html': markdown_filter(content)})
+                    yield sse_event('done', {'agent': agent_name})
+                    final[agent_name] = content
+                    if agent_name in cache_keys:
+                        store_cached_responses(cache_keys, {agent_name: content})
+                    continue
+
+                # Failed - check if it's a rate limit error
+                error = error_payload_message(content) if is_error_payload(content) else payload
+                if is_error_payload(content) or is_rate_limit_error(error):
+                    record_rate_limit(error or '')
+
+                use_fallback = True
+                yield fallback_event(agent_name, 'error')
+
+            # Anything still running missed the deadline
+            for agent_name in agent_names:
+                if agent_name in pending:
+                    use_fallback = True
+                    calls[agent_name].record('timeout')
+                    yield fallback_event(agent_name, 'timeout')
+
+            if use_fallback:
+                yield sse_event('notice', {
+                    'message': '⚠️ AI service is temporarily at capacity. Showing expertly crafted recovery guidance.',
+                    'category': 'info'
+                })
+        finally:
+            # Keep what already arrived, even when the client went away mid-stream
+            for agent_name, text in texts.items():
+                if agent_name not in final and text.strip() and not is_error_payload(text):
+                    final[agent_name] = text
+            save_plan_result(user_id, plan_type, final, result=db.session.get(PlanResult, result_id))
+        yield sse_event('end', {})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/results')
+def last_results():
+    """Most recent plan generated in this session"""
+    result_id = session.get('last_result_id')
+    if not result_id:
+        return redirect(url_for('index'))
+    return redirect(url_for('view_results', result_id=result_id))
+
+@app.route('/results/<result_id>')
+def view_results(result_id):
+    """Show a stored recovery plan without regenerating it"""
+    if not current_user.is_authenticated:
+        return redirect(url_for('index'))
+
+    result = db.session.get(PlanResult, result_id)
+    if result is None or result.user_id != current_user.id:
+        abort(404)
+
+    # Sections missing from an interrupted stream show the canned guidance
+    responses = get_fallback_responses('', result.plan_type or '7day')
+    responses.update(json.loads(result.responses))
+    return render_template('results.html', responses=responses)
+
+@app.route('/api/cache/stats')
+def cache_stats():
+    """Response cache hit/miss counters for measuring saved LLM quota"""
+    hits = get_counter('llm_cache_hits')
+    misses = get_counter('llm_cache_misses')
+    lookups = hits + misses
+    return jsonify({
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+        'entries': ResponseCache.query.count()
+    })
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics, summed over all gunicorn workers in multiprocess mode"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
 
 @app.route('/journal', methods=['GET', 'POST'])
 def journal():
@@ -670,31 +2274,118 @@ def journal():
         mood = request.form.get('mood', 'neutral')
         tags = request.form.get('tags', '')
         
-        entry = JournalEntry(
-            user_id=current_user.id,
-            content=content,
-            mood=mood,
-            tags=tags
-        )
-        db.session.add(entry)
+        if not content or not content.strip():
+            flash('Please write something before saving', 'error')
+            return redirect(url_for('journal'))
         
-        # Update progress
-        progress = Progress(
-            user_id=current_user.id,
-            mood_score={'happy': 8, 'neutral': 5, 'sad': 3}.get(mood, 5),
-            activity_score=6,
-            social_score=5
-        )
-        db.session.add(progress)
+        submission = {
+            'user_id': current_user.id,
+            'content': content,
+            'mood': mood,
+            'tags': tags,
+            'created_at': datetime.utcnow()
+        }
+        save_journal_submission(submission)
         db.session.commit()
         
         flash('Journal entry saved!', 'success')
         return redirect(url_for('journal'))
     
-    entries = JournalEntry.query.filter_by(user_id=current_user.id)\
-        .order_by(JournalEntry.created_at.desc()).all()
+    tag = request.args.get('tag') or None
+    try:
+        entries, next_cursor = journal_page(current_user.id, before=request.args.get('before'), tag=tag)
+    except ValueError:
+        # A stale or hand-edited cursor just shows the first page
+        entries, next_cursor = journal_page(current_user.id, tag=tag)
     
-    return render_template('journal.html', entries=entries)
+    return render_template('journal.html',
+                         entries=entries,
+                         next_cursor=next_cursor,
+                         tag=tag,
+                         top_tags=top_tags(current_user.id),
+                         total_entries=get_user_stats(current_user.id).total_entries)
+
+@app.route('/api/journal')
+def journal_api():
+    """Keyset-paginated journal entries for infinite scroll"""
+    if not current_user.is_authenticated:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    limit = min(request.args.get('limit', app.config['JOURNAL_PAGE_SIZE'], type=int), 100)
+    if limit < 1:
+        return jsonify({'error': 'limit must be positive'}), 400
+
+    try:
+        entries, next_cursor = journal_page(current_user.id, before=request.args.get('before'), limit=limit,
+                                            tag=request.args.get('tag') or None)
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+
+    return jsonify({
+        'entries': [serialize_journal_entry(entry) for entry in entries],
+        'next_cursor': next_cursor
+    })
+
+@app.route('/api/journal/tags')
+def journal_tags_api():
+    """The user's most used tags with their entry counts, for facet sidebars"""
+    if not current_user.is_authenticated:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    limit = min(request.args.get('limit', 20, type=int), 100)
+    return jsonify({'tags': [{'name': name, 'count': count} for name, count in top_tags(current_user.id, limit)]})
+
+@app.route('/api/journal/search')
+def journal_search_api():
+    """Ranked full-text search over the user's journal, filterable by mood and date range"""
+    if not current_user.is_authenticated:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    text = request.args.get('q', '').strip()
+    if not text:
+        return jsonify({'error': 'q is required'}), 400
+    limit = min(request.args.get('limit', app.config['JOURNAL_PAGE_SIZE'], type=int), 100)
+    offset = request.args.get('offset', 0, type=int)
+    if limit < 1 or offset < 0:
+        return jsonify({'error': 'limit must be positive and offset not negative'}), 400
+    try:
+        date_from = date.fromisoformat(request.args['from']) if request.args.get('from') else None
+        date_to = date.fromisoformat(request.args['to']) if request.args.get('to') else None
+    except ValueError:
+        return jsonify({'error': 'from and to must be YYYY-MM-DD dates'}), 400
+
+    results = search_journal(current_user.id, text, mood=request.args.get('mood') or None,
+                             date_from=date_from, date_to=date_to, limit=limit, offset=offset)
+    return jsonify({
+        'results': [dict(serialize_journal_entry(entry), snippet=snippet) for entry, snippet in results],
+        'next_offset': offset + limit if len(results) == limit else None
+    })
+
+@app.route('/api/progress')
+def progress_api():
+    """Daily, weekly or monthly progress averages and ranges for charts over a date range"""
+    if not current_user.is_authenticated:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    bucket = request.args.get('bucket', 'day')
+    if bucket not in PROGRESS_BUCKETS:
+        return jsonify({'error': 'bucket must be day, week or month'}), 400
+    try:
+        date_to = date.fromisoformat(request.args['to']) if request.args.get('to') else datetime.utcnow().date()
+        date_from = date.fromisoformat(request.args['from']) if request.args.get('from') \
+            else date_to - timedelta(days=6 * PROGRESS_BUCKET_DAYS[bucket])
+    except ValueError:
+        return jsonify({'error': 'from and to must be YYYY-MM-DD dates'}), 400
+    except OverflowError:
+        # The default range would start before 0001-01-01
+        return jsonify({'error': 'to is too early for the default range; pass from as well'}), 400
+    if date_from > date_to:
+        return jsonify({'error': 'from must not be after to'}), 400
+    if (date_to - date_from).days // PROGRESS_BUCKET_DAYS[bucket] >= PROGRESS_MAX_POINTS:
+        return jsonify({'error': f'Range too long for {bucket} buckets; use a larger bucket'}), 400
+
+    series = progress_series(current_user.id, bucket, date_from, date_to)
+    return jsonify(dict(series, **{'from': date_from.isoformat(), 'to': date_to.isoformat()}))
 
 @app.route('/delete_entry/<int:entry_id>', methods=['POST'])
 @login_required
@@ -706,11 +2397,15 @@ def delete_entry(entry_id):
         return redirect(url_for('journal'))
     
     db.session.delete(entry)
+    db.session.flush()
+    recompute_user_stats(entry.user_id)
+    increment_counter(JOURNAL_COUNTER, -1)
     db.session.commit()
     flash('Entry deleted successfully', 'success')
     return redirect(request.referrer or url_for('dashboard'))
 
 @app.route('/resources')
+@cached_page()
 def resources():
     """Indian-specific resources page with comprehensive information"""
     resources_data = {
@@ -789,114 +2484,109 @@ def resources():
 
 @app.route('/community')
 def community():
-    """Support community forum with dynamic content"""
-    from datetime import datetime, timedelta
-    import random
-    
-    # Generate dynamic community stats
-    community_stats = {
-        'total_members': random.randint(4500, 5500),
-        'posts_today': random.randint(15, 45),
-        'active_now': random.randint(50, 150),
-        'success_stories': random.randint(200, 300)
-    }
-    
-    # Sample posts (in production, these would come from database)
-    sample_posts = [
-        {
-            'id': 1,
-            'author': 'Priya M.',
-            'time_ago': '2 hours ago',
-            'category': 'success',
-            'content': 'It\'s been 3 months since my breakup, and I can finally say I\'m happy again! This community and the AI tools helped me so much. To anyone struggling: it gets better, I promise. 💪',
-            'hearts': 45,
-            'hugs': 23,
-            'comments': 12
-        },
-        {
-            'id': 2,
-            'author': 'Rahul K.',
-            'time_ago': '5 hours ago',
-            'category': 'advice',
-            'content': 'How do you deal with seeing your ex on social media? I know I should unfollow but I can\'t bring myself to do it. Any advice?',
-            'hearts': 18,
-            'hugs': 34,
-            'comments': 28
-        },
-        {
-            'id': 3,
-            'author': 'Ananya S.',
-            'time_ago': '8 hours ago',
-            'category': 'support',
-            'content': 'Today marks one month. Some days are harder than others, but I\'m learning to be okay with not being okay. Thank you all for being here.',
-            'hearts': 67,
-            'hugs': 89,
-            'comments': 19
-        },
-        {
-            'id': 4,
-            'author': 'Vikram P.',
-            'time_ago': '12 hours ago',
-            'category': 'general',
-            'content': 'Just wanted to share that I went out with friends for the first time in weeks. Baby steps, but it felt good to laugh again.',
-            'hearts': 52,
-            'hugs': 41,
-            'comments': 15
-        },
-        {
-            'id': 5,
-            'author': 'Meera D.',
-            'time_ago': '1 day ago',
-            'category': 'resources',
-            'content': 'Found this amazing meditation app that\'s been helping with anxiety. DM me if you want the name. Also, the breathing exercise on this platform is a lifesaver!',
-            'hearts': 38,
-            'hugs': 22,
-            'comments': 31
-        },
-        {
-            'id': 6,
-            'author': 'Arjun T.',
-            'time_ago': '1 day ago',
-            'category': 'advice',
-            'content': 'Is it normal to still miss them even when you know the relationship was toxic? I feel so conflicted.',
-            'hearts': 42,
-            'hugs': 58,
-            'comments': 24
-        }
-    ]
-    
-    # Top contributors
-    top_contributors = [
-        {'name': 'Kavya R.', 'posts': 47, 'hearts': 892},
-        {'name': 'Aditya M.', 'posts': 39, 'hearts': 756},
-        {'name': 'Shreya K.', 'posts': 35, 'hearts': 634},
-        {'name': 'Rohan S.', 'posts': 28, 'hearts': 521},
-        {'name': 'Nisha P.', 'posts': 24, 'hearts': 489}
-    ]
-    
-    return render_template('community.html', 
-                         community_stats=community_stats,
-                         posts=sample_posts,
-                         top_contributors=top_contributors)
+    """Support community forum with the cached first page of the feed"""
+    snapshot = get_community_snapshot()
+    posts = with_time_ago(snapshot['posts'])
+    reactions = {}
+    if current_user.is_authenticated:
+        reactions = user_reactions(current_user.id, [post['id'] for post in posts])
+
+    return render_template('community.html',
+                         community_stats=snapshot['stats'],
+                         posts=posts,
+                         next_cursor=snapshot['next_cursor'],
+                         reactions=reactions,
+                         top_contributors=snapshot['top_contributors'])
+
+@app.route('/community/post', methods=['POST'])
+def create_community_post():
+    """Publish a post to the community feed"""
+    if not current_user.is_authenticated:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    data = request.get_json(silent=True) or request.form
+    content = (data.get('content') or '').strip()
+    category = data.get('category') or 'general'
+    if not content:
+        return jsonify({'error': 'content is required'}), 400
+    if len(content) > COMMUNITY_POST_MAX_LENGTH:
+        return jsonify({'error': f'Posts are limited to {COMMUNITY_POST_MAX_LENGTH} characters'}), 400
+    if category not in COMMUNITY_CATEGORIES:
+        return jsonify({'error': 'Unknown category'}), 400
+
+    post = CommunityPost(user_id=current_user.id, category=category, content=content)
+    db.session.add(post)
+    increment_counter(COMMUNITY_POST_COUNTER)
+    db.session.commit()
+    invalidate_community_snapshot()
+    return jsonify({'post': with_time_ago([serialize_post(post)])[0]}), 201
+
+@app.route('/community/post/<int:post_id>/react', methods=['POST'])
+def react_to_post(post_id):
+    """Set or clear the user's heart or hug on a post; written in the next reaction flush"""
+    if not current_user.is_authenticated:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    data = request.get_json(silent=True) or {}
+    kind = data.get('type')
+    if kind not in REACTION_COUNTERS:
+        return jsonify({'error': 'type must be heart or hug'}), 400
+    if db.session.get(CommunityPost, post_id) is None:
+        return jsonify({'error': 'Post not found'}), 404
+
+    reacted = bool(data.get('active', True))
+    REACTIONS.submit(post_id, current_user.id, kind, reacted)
+    return jsonify({'post_id': post_id, 'type': kind, 'active': reacted}), 202
+
+@app.route('/api/community/posts')
+def community_posts_api():
+    """Cursor-paginated community feed, newest first, optionally one category"""
+    limit = min(request.args.get('limit', app.config['COMMUNITY_PAGE_SIZE'], type=int), 50)
+    if limit < 1:
+        return jsonify({'error': 'limit must be positive'}), 400
+    category = request.args.get('category') or None
+    if category is not None and category not in COMMUNITY_CATEGORIES:
+        return jsonify({'error': 'Unknown category'}), 400
+    before = request.args.get('before')
+
+    if before is None and category is None and limit == app.config['COMMUNITY_PAGE_SIZE']:
+        snapshot = get_community_snapshot()
+        posts, next_cursor = snapshot['posts'], snapshot['next_cursor']
+    else:
+        try:
+            posts, next_cursor = community_page(before=before, limit=limit, category=category)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+    posts = with_time_ago(posts)
+
+    if current_user.is_authenticated:
+        reactions = user_reactions(current_user.id, [post['id'] for post in posts])
+        for post in posts:
+            post['reactions'] = sorted(reactions.get(post['id'], ()))
+    return jsonify({'posts': posts, 'next_cursor': next_cursor})
 
 @app.route('/about')
+@cached_page()
 def about():
     """About Us page"""
     return render_template('about.html')
 
 @app.route('/privacy')
+@cached_page(daily=True)
 def privacy():
     """Privacy Policy page"""
     from datetime import datetime
     return render_template('privacy.html', current_date=datetime.now().strftime('%B %d, %Y'))
 
 @app.route('/terms')
+@cached_page(daily=True)
 def terms():
     """Terms of Service page"""
     from datetime import datetime
     return render_template('terms.html', current_date=datetime.now().strftime('%B %d, %Y'))
 
 @app.route('/contact', methods=['GET', 'POST'])
+@cached_page()
 def contact():
     """Contact Us page"""
     if request.method == 'POST':
@@ -908,17 +2598,394 @@ def contact():
     
     return render_template('contact.html')
 
+MARKDOWN_EXTRAS = ["fenced-code-blocks", "tables", "strike", "underline"]
+PLAN_TYPES = ['7day', '14day', '30day']
+
+# Rendered HTML keyed by a digest of the markdown source, least recently used first
+_MARKDOWN_CACHE = OrderedDict()
+_MARKDOWN_CACHE_LOCK = threading.Lock()
+
+def convert_markdown(text):
+    """Render markdown to HTML without touching the cache"""
+    import markdown2  # loaded on the first conversion rather than at worker boot
+    return markdown2.markdown(text, extras=MARKDOWN_EXTRAS)
+
+def render_markdown(text):
+    """Render markdown to HTML, memoized in a bounded LRU keyed by content hash"""
+    key = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+    with _MARKDOWN_CACHE_LOCK:
+        html = _MARKDOWN_CACHE.get(key)
+        if html is not None:
+            _MARKDOWN_CACHE.move_to_end(key)
+            return html
+
+    html = convert_markdown(text)
+    with _MARKDOWN_CACHE_LOCK:
+        _MARKDOWN_CACHE[key] = html
+        while len(_MARKDOWN_CACHE) > app.config['MARKDOWN_CACHE_SIZE']:
+            _MARKDOWN_CACHE.popitem(last=False)
+    return html
+
+def warm_markdown_cache():
+    """Pre-render the canned fallback responses so rate-limited users never pay for conversion"""
+    for plan_type in PLAN_TYPES:
+        for text in get_fallback_responses('', plan_type).values():
+            render_markdown(text)
+
 @app.template_filter('markdown')
 def markdown_filter(text):
     if not text:
         return ""
-    return markdown2.markdown(text, extras=["fenced-code-blocks", "tables", "strike", "underline"])
+    return render_markdown(text)
 
 # ------------------------------
-# Initialize Database
+# Static Assets
+# ------------------------------
+# `flask build-assets` writes minified, content-hashed copies of the CSS/JS (plus .gz and .br
+# variants) under static/dist and maps original names to them in the manifest
+ASSET_DIR = 'dist'
+ASSET_MINIFIERS = {'.css': 'rcssmin', '.js': 'rjsmin'}
+ONE_YEAR = 365 * 24 * 3600
+
+def load_asset_manifest():
+    """Original static path -> fingerprinted path, empty until assets are built"""
+    path = Path(app.static_folder, ASSET_DIR, 'manifest.json')
+    if not app.config['STATIC_FINGERPRINTING'] or not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding='utf-8'))
+
+ASSET_MANIFEST = load_asset_manifest()
+
+def asset_url_for(endpoint, **values):
+    """url_for that points static files at their fingerprinted build when one exists"""
+    if endpoint == 'static' and 'filename' in values:
+        values['filename'] = ASSET_MANIFEST.get(values['filename'], values['filename'])
+    return url_for(endpoint, **values)
+
+@app.context_processor
+def inject_asset_url_for():
+    return {'url_for': asset_url_for}
+
+def serve_static(filename):
+    """Static files; fingerprinted builds are immutable and served precompressed when accepted"""
+    if not filename.startswith(ASSET_DIR + '/'):
+        return app.send_static_file(filename)
+
+    mimetype = mimetypes.guess_type(filename)[0]
+    encoding = None
+    for candidate, suffix in (('br', '.br'), ('gzip', '.gz')):
+        path = safe_join(app.static_folder, filename + suffix)
+        if request.accept_encodings[candidate] and path and os.path.isfile(path):
+            encoding = candidate
+            filename += suffix
+            break
+
+    response = send_from_directory(app.static_folder, filename, mimetype=mimetype, max_age=ONE_YEAR)
+    if encoding:
+        response.content_encoding = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+app.view_functions['static'] = serve_static
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    """Minify, fingerprint and precompress static CSS/JS into static/dist"""
+    import gzip
+    import importlib
+    import brotli
+
+    global ASSET_MANIFEST
+    static_root = Path(app.static_folder)
+    dist = static_root / ASSET_DIR
+    shutil.rmtree(dist, ignore_errors=True)
+
+    manifest = {}
+    for source in sorted(static_root.rglob('*')):
+        if source.suffix not in ASSET_MINIFIERS or dist in source.parents:
+            continue
+        minify = getattr(importlib.import_module(ASSET_MINIFIERS[source.suffix]), source.suffix[1:] + 'min')
+        content = minify(source.read_text(encoding='utf-8')).encode()
+        digest = hashlib.sha256(content).hexdigest()[:12]
+        relative = source.relative_to(static_root)
+        target = dist / relative.with_name(f'{source.stem}.{digest}{source.suffix}')
+        target.parent.mkdir(parents=True, exist_ok=True)
+
+        gzipped = gzip.compress(content, compresslevel=9, mtime=0)
+        brotlied = brotli.compress(content, quality=11)
+        target.write_bytes(content)
+        Path(f'{target}.gz').write_bytes(gzipped)
+        Path(f'{target}.br').write_bytes(brotlied)
+
+        manifest[relative.as_posix()] = target.relative_to(static_root).as_posix()
+        print(f"{relative.as_posix()} -> {manifest[relative.as_posix()]}: {source.stat().st_size} bytes, "
+              f"{len(content)} minified, {len(gzipped)} gzip, {len(brotlied)} brotli")
+
+    (dist / 'manifest.json').write_text(json.dumps(manifest, indent=2), encoding='utf-8')
+    ASSET_MANIFEST = load_asset_manifest()
+
+# ------------------------------
+# Schema Migrations
 # ------------------------------
-with app.app_context():
+def create_indexes(*indexes):
+    """Migration step that creates (model, index name) pairs if they don't exist yet"""
+    def step(connection):
+        for model, name in indexes:
+            index = next(index for index in model.__table__.indexes if index.name == name)
+            connection.execute(CreateIndex(index, if_not_exists=True))
+    return step
+
+def add_columns(*columns):
+    """Migration step that adds (model, column name) pairs to existing tables if missing"""
+    def step(connection):
+        inspector = db.inspect(connection)
+        for model, name in columns:
+            table = model.__table__
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            if name not in existing:
+                column_type = table.c[name].type.compile(dialect=connection.dialect)
+                connection.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {name} {column_type}')
+    return step
+
+def create_journal_search(connection):
+    """Migration step that builds the full-text index for this database's dialect"""
+    if connection.dialect.name == 'sqlite':
+        statements = SQLITE_JOURNAL_SEARCH
+    elif connection.dialect.name == 'postgresql':
+        statements = POSTGRES_JOURNAL_SEARCH
+    else:
+        return
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+
+TAG_MIGRATION_CHUNK = 5000
+
+def migrate_journal_tags(connection):
+    """Migration step that rebuilds the tag tables from the comma-separated JournalEntry.tags in bulk"""
+    entries = JournalEntry.__table__
+    tags = Tag.__table__
+    counts = UserTagCount.__table__
+    connection.execute(journal_entry_tag.delete())
+    connection.execute(counts.delete())
+
+    known = dict(connection.execute(db.select(tags.c.key, tags.c.id)).all())
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            db.select(entries.c.id, entries.c.tags)
+            .where(entries.c.id > last_id, entries.c.tags.isnot(None), entries.c.tags != '')
+            .order_by(entries.c.id).limit(TAG_MIGRATION_CHUNK)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        parsed = [(entry_id, parse_tags(text)) for entry_id, text in rows]
+
+        new = {key: name for _, pairs in parsed for key, name in pairs if key not in known}
+        if new:
+            newest = max(known.values(), default=0)
+            connection.execute(tags.insert(), [{'key': key, 'name': name} for key, name in new.items()])
+            known.update(connection.execute(db.select(tags.c.key, tags.c.id).where(tags.c.id > newest)).all())
+        links = [{'entry_id': entry_id, 'tag_id': known[key]} for entry_id, pairs in parsed for key, _ in pairs]
+        if links:
+            connection.execute(journal_entry_tag.insert(), links)
+
+    connection.execute(counts.insert().from_select(
+        ['user_id', 'tag_id', 'count'],
+        db.select(entries.c.user_id, journal_entry_tag.c.tag_id, db.func.count())
+        .select_from(journal_entry_tag.join(entries, entries.c.id == journal_entry_tag.c.entry_id))
+        .group_by(entries.c.user_id, journal_entry_tag.c.tag_id)
+    ))
+
+PROGRESS_MIGRATION_CHUNK = 5000
+
+def backfill_progress_rollups(connection):
+    """Migration step that rebuilds the Progress rollups: days in SQL, weeks and months folded from the days"""
+    progress = Progress.__table__
+    rollups = ProgressRollup.__table__
+    connection.execute(rollups.delete())
+
+    aggregates = [db.func.count()]
+    for score in PROGRESS_SCORES:
+        column = progress.c[f'{score}_score']
+        aggregates += [db.func.coalesce(db.func.sum(column), 0), db.func.min(column), db.func.max(column)]
+    columns = ['count'] + [f'{score}_{part}' for score in PROGRESS_SCORES for part in ('sum', 'min', 'max')]
+    connection.execute(rollups.insert().from_select(
+        ['user_id', 'bucket', 'period_start'] + columns,
+        db.select(progress.c.user_id, db.literal('day'), progress.c.date, *aggregates)
+        .where(progress.c.date.isnot(None))
+        .group_by(progress.c.user_id, progress.c.date)
+    ))
+
+    def fold(into, day):
+        if into is None:
+            return dict(day)
+        into['count'] += day['count']
+        for score in PROGRESS_SCORES:
+            into[f'{score}_sum'] += day[f'{score}_sum']
+            for part, pick in (('min', min), ('max', max)):
+                values = [v for v in (into[f'{score}_{part}'], day[f'{score}_{part}']) if v is not None]
+                into[f'{score}_{part}'] = pick(values) if values else None
+        return into
+
+    days = connection.execute(
+        db.select(rollups.c.user_id, rollups.c.period_start, *(rollups.c[name] for name in columns))
+        .where(rollups.c.bucket == 'day').order_by(rollups.c.user_id, rollups.c.period_start)
+    ).mappings().all()
+    periods = {}
+    for day in days:
+        for bucket in ('week', 'month'):
+            key = (day['user_id'], bucket, period_start(day['period_start'], bucket))
+            periods[key] = fold(periods.get(key), day)
+    rows = [dict(values, user_id=user_id, bucket=bucket, period_start=start)
+            for (user_id, bucket, start), values in periods.items()]
+    for start in range(0, len(rows), PROGRESS_MIGRATION_CHUNK):
+        connection.execute(rollups.insert(), rows[start:start + PROGRESS_MIGRATION_CHUNK])
+
+def seed_counters(*counters):
+    """Migration step that starts (counter name, model) counters from a full count if they don't exist yet"""
+    def step(connection):
+        table = StatCounter.__table__
+        for name, model in counters:
+            if connection.execute(db.select(table.c.name).where(table.c.name == name)).first() is None:
+                count = connection.execute(db.select(db.func.count()).select_from(model.__table__)).scalar()
+                connection.execute(table.insert().values(name=name, value=count))
+    return step
+
+# Append-only list of (version, description, step); steps must be idempotent
+MIGRATIONS = [
+    (1, 'Composite indexes for per-user timelines', create_indexes(
+        (JournalEntry, 'ix_journal_entry_user_created'),
+        (Progress, 'ix_progress_user_date')
+    )),
+    (2, 'Analyzed mood on journal entries', add_columns(
+        (JournalEntry, 'analyzed_mood')
+    )),
+    (3, 'Homepage counters', seed_counters(
+        (USER_COUNTER, User),
+        (JOURNAL_COUNTER, JournalEntry)
+    )),
+    (4, 'Journal full-text search', create_journal_search),
+    (5, 'Normalized journal tags', migrate_journal_tags),
+    (6, 'Progress rollups', backfill_progress_rollups),
+]
+
+def migrate_database():
+    """Create missing tables and apply pending migrations to an existing database"""
     db.create_all()
+    table = SchemaVersion.__table__
+    with db.engine.begin() as connection:
+        current = connection.execute(db.select(table.c.version)).scalar()
+        if current is None:
+            current = 0
+            connection.execute(table.insert().values(id=1, version=0))
+        for version, description, step in MIGRATIONS:
+            if version > current:
+                step(connection)
+                connection.execute(table.update().values(version=version))
+                app.logger.info('Applied schema migration %s: %s', version, description)
+
+@app.cli.command('migrate')
+def migrate_command():
+    """Create missing tables and upgrade the database schema in place"""
+    migrate_database()
+    print(f"Database is at schema version {MIGRATIONS[-1][0]}")
+
+RESCORE_CHECKPOINT = 'rescore_journal_last_id'
+
+@app.cli.command('rescore-journal')
+@click.option('--chunk-size', default=5000, show_default=True, help='Rows read, scored and written per batch')
+@click.option('--workers', default=os.cpu_count() or 1, show_default=True, help='Scoring processes')
+@click.option('--restart', is_flag=True, help='Ignore the saved checkpoint and rescore from the first entry')
+def rescore_journal_command(chunk_size, workers, restart):
+    """Recompute analyzed_mood for every journal entry, resuming after the last processed id"""
+    table = JournalEntry.__table__
+    checkpoint = get_counter(RESCORE_CHECKPOINT)
+    if restart and checkpoint:
+        increment_counter(RESCORE_CHECKPOINT, -checkpoint)
+        db.session.commit()
+        checkpoint = 0
+    if checkpoint:
+        print(f"Resuming after journal entry {checkpoint}")
+
+    def chunks(after_id):
+        # Keyset chunks over the primary key: each read is a short range scan,
+        # so no read transaction stays open while batches are written back
+        while True:
+            rows = db.session.execute(
+                db.select(table.c.id, table.c.content)
+                .where(table.c.id > after_id).order_by(table.c.id).limit(chunk_size)
+            ).all()
+            db.session.rollback()
+            if not rows:
+                return
+            after_id = rows[-1].id
+            yield [row.id for row in rows], [row.content or '' for row in rows]
+
+    def write(ids, future):
+        nonlocal checkpoint
+        db.session.execute(
+            table.update().where(table.c.id == db.bindparam('row_id'))
+            .values(analyzed_mood=db.bindparam('score')),
+            [{'row_id': row_id, 'score': score} for row_id, score in zip(ids, future.result())]
+        )
+        increment_counter(RESCORE_CHECKPOINT, ids[-1] - checkpoint)
+        db.session.commit()
+        checkpoint = ids[-1]
+        return len(ids)
+
+    processed = 0
+    start = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        # Keep every worker busy while finished batches are written back in id order
+        pending = []
+        for ids, texts in chunks(checkpoint):
+            pending.append((ids, pool.submit(analyze_moods, texts)))
+            if len(pending) > workers:
+                processed += write(*pending.pop(0))
+                elapsed = time.perf_counter() - start
+                print(f"{processed} entries rescored ({processed / elapsed:.0f} rows/s), last id {checkpoint}")
+        for ids, future in pending:
+            processed += write(ids, future)
+
+    elapsed = time.perf_counter() - start
+    rate = processed / elapsed if elapsed else 0
+    print(f"Rescored {processed} journal entries in {elapsed:.1f}s ({rate:.0f} rows/s)")
+
+@app.cli.command('mock-llm')
+@click.option('--host', default='127.0.0.1', show_default=True)
+@click.option('--port', default=8001, show_default=True)
+@click.option('--backend', type=click.Choice(['mock', 'record', 'replay']),
+              help='Defaults to LLM_BACKEND, or mock when that is groq')
+def mock_llm_command(host, port, backend):
+    """Serve a Groq-compatible API from the mock, record or replay backend"""
+    if backend is None:
+        backend = app.config['LLM_BACKEND'] if app.config['LLM_BACKEND'] != 'groq' else 'mock'
+    transport = llm_backends.make_transport({**app.config, 'LLM_BACKEND': backend})
+    print(f"Serving the {backend} LLM backend; point other processes at it with LLM_BASE_URL=http://{host}:{port}")
+    llm_backends.serve(transport, host, port)
+
+# ------------------------------
+# Initialize Database
+# ------------------------------
+# Nothing runs at import: `flask migrate` (or the gunicorn master, see gunicorn.conf.py)
+# prepares the schema once, instead of every worker and test doing it on boot
+def init_app():
+    """Bring the schema up to date"""
+    with app.app_context():
+        migrate_database()
+        # The migration connection must not be inherited by forked workers
+        db.engine.dispose()
+
+def warm_up():
+    """Load the lazily imported modules and fill the markdown cache before serving"""
+    import_llm_stack()
+    with app.app_context():
+        warm_markdown_cache()
 
 if __name__ == '__main__':
+    init_app()
+    warm_up()
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,122 @@
+"""
+Benchmark the community feed on a seeded SQLite database: GET /community from
+concurrent readers with the cached first page against rebuilding it on every
+request, and a burst of hearts on one post written through the in-memory
+reaction buffer against one transaction per click.
+
+Usage:
+    python benchmarks/community_benchmark.py --users 1000 --posts 200000 --threads 8
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+from harness import benchmark_app
+
+CHUNK = 20000
+
+
+def seed(app_module, users, posts):
+    """Users and posts over the last 90 days, written straight to the tables"""
+    db = app_module.db
+    now = datetime.utcnow()
+    rng = random.Random(42)
+    with db.engine.begin() as connection:
+        connection.execute(app_module.User.__table__.insert(), [
+            {'username': f'user{i}', 'email': f'user{i}@example.com', 'password_hash': 'x'}
+            for i in range(users)
+        ])
+    for start in range(0, posts, CHUNK):
+        rows = [
+            {'user_id': rng.randint(1, users), 'category': rng.choice(app_module.COMMUNITY_CATEGORIES),
+             'content': 'Seeded post', 'created_at': now - timedelta(minutes=rng.randint(0, 60 * 24 * 90)),
+             'hearts': rng.randint(0, 50), 'hugs': rng.randint(0, 50)}
+            for _ in range(min(CHUNK, posts - start))
+        ]
+        with db.engine.begin() as connection:
+            connection.execute(app_module.CommunityPost.__table__.insert(), rows)
+
+
+def uncached_snapshot(app_module):
+    """The uncached way: query the first page and the sidebar numbers on every request"""
+    posts, next_cursor = app_module.community_page()
+    stats, top_contributors = app_module.community_stats()
+    return {'posts': posts, 'next_cursor': next_cursor, 'stats': stats, 'top_contributors': top_contributors}
+
+
+def readers(app_module, threads, requests):
+    """Requests per second for GET /community from `threads` logged-in clients"""
+    def read(user_id):
+        client = app_module.app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+        for _ in range(requests):
+            assert client.get('/community').status_code == 200
+
+    workers = [threading.Thread(target=read, args=(user_id,)) for user_id in range(1, threads + 1)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return round(threads * requests / (time.perf_counter() - start), 1)
+
+
+def reaction_burst(app_module, post_id, user_ids, buffered):
+    """Seconds until every heart of the burst is committed"""
+    db = app_module.db
+    start = time.perf_counter()
+    if buffered:
+        for user_id in user_ids:
+            app_module.REACTIONS.submit(post_id, user_id, 'heart', True)
+        batch, app_module.REACTIONS.pending = app_module.REACTIONS.pending, {}
+        app_module.REACTIONS.write(batch)
+    else:
+        for user_id in user_ids:
+            app_module.apply_reactions({(post_id, user_id, 'heart'): True})
+            db.session.commit()
+    return round(time.perf_counter() - start, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--posts', type=int, default=200000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=50, help='page loads per reader thread')
+    args = parser.parse_args()
+
+    with benchmark_app(COMMUNITY_FEED_TTL='60') as app_module, app_module.app.app_context():
+        db = app_module.db
+        seed(app_module, args.users, args.posts)
+        cached = readers(app_module, args.threads, args.requests)
+        snapshot = app_module.get_community_snapshot
+        app_module.get_community_snapshot = lambda: uncached_snapshot(app_module)
+        pages_per_second = {
+            'cached_first_page': cached,
+            'queried_every_request': readers(app_module, args.threads, args.requests),
+        }
+        app_module.get_community_snapshot = snapshot
+
+        burst = list(range(1, args.users + 1))
+        first, second = db.session.query(app_module.CommunityPost.id).order_by(
+            app_module.CommunityPost.id.desc()).limit(2).all()
+        burst_seconds = {
+            'buffered': reaction_burst(app_module, first.id, burst, buffered=True),
+            'transaction_per_click': reaction_burst(app_module, second.id, burst, buffered=False),
+        }
+
+    print(json.dumps({
+        'users': args.users,
+        'posts': args.posts,
+        'reader_threads': args.threads,
+        'community_pages_per_second': pages_per_second,
+        f'seconds_to_commit_{len(burst)}_hearts_on_one_post': burst_seconds,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
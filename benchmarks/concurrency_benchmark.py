@@ -0,0 +1,176 @@
+"""
+Concurrency benchmark for the SQLite engine profile: forked worker
+processes with several threads each mix dashboard reads and journal
+writes against one database file, as gunicorn workers would. Runs the
+stock SQLite settings (rollback journal, synchronous=FULL) and the tuned
+profile from config.py (WAL, synchronous=NORMAL, busy_timeout, mmap,
+larger page cache), each in a fresh database.
+
+Usage:
+    python benchmarks/concurrency_benchmark.py --processes 4 --threads 8 --seconds 10
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+from harness import benchmark_app
+
+PROFILES = {
+    'stock': {
+        'SQLITE_JOURNAL_MODE': 'DELETE',
+        'SQLITE_SYNCHRONOUS': 'FULL',
+        'SQLITE_BUSY_TIMEOUT_MS': '5000',  # what pysqlite sets by default
+        'SQLITE_MMAP_SIZE': '0',
+        'SQLITE_CACHE_SIZE': '-2000',
+    },
+    'tuned': {},  # config.py defaults
+}
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return None
+    samples = sorted(samples)
+    return round(samples[min(len(samples) - 1, int(len(samples) * fraction))] * 1000, 2)
+
+
+def seed(app_module, users, entries_per_user):
+    """Users with some journal history so the dashboard has rows to read"""
+    db = app_module.db
+    now = datetime.utcnow()
+    rng = random.Random(42)
+    with db.engine.begin() as connection:
+        connection.execute(app_module.User.__table__.insert(), [
+            {'username': f'user{i}', 'email': f'user{i}@example.com', 'password_hash': 'x'}
+            for i in range(users)
+        ])
+        connection.execute(app_module.JournalEntry.__table__.insert(), [
+            {'user_id': user_id, 'content': 'Seed entry', 'mood': 'neutral', 'tags': '',
+             'created_at': now - timedelta(minutes=rng.randint(0, 60 * 24 * 90))}
+            for user_id in range(1, users + 1) for _ in range(entries_per_user)
+        ])
+        connection.execute(app_module.Progress.__table__.insert(), [
+            {'user_id': user_id, 'date': (now - timedelta(days=day)).date(),
+             'mood_score': 5, 'activity_score': 6, 'social_score': 5}
+            for user_id in range(1, users + 1) for day in range(30)
+        ])
+
+
+def client_loop(app_module, user_id, args, deadline, results):
+    """Mix dashboard reads and journal writes for one user until the deadline"""
+    client = app_module.app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id)
+        sess['_fresh'] = True
+    rng = random.Random(user_id)
+    while time.monotonic() < deadline:
+        write = rng.random() < args.write_ratio
+        start = time.perf_counter()
+        if write:
+            response = client.post('/journal', data={'content': 'Went for a walk, feeling calm', 'mood': 'happy'})
+        else:
+            response = client.get('/dashboard')
+        response.get_data()
+        elapsed = time.perf_counter() - start
+        kind = 'write' if write else 'read'
+        if response.status_code >= 500:
+            results[kind + '_errors'] += 1
+        else:
+            results[kind].append(elapsed)
+
+
+def worker(app_module, first_user, args, barrier, queue):
+    """One forked worker process running `args.threads` client threads"""
+    app_module.app.logger.disabled = True
+    with app_module.app.app_context():
+        # Connections inherited from the parent must not be reused after fork
+        app_module.db.engine.dispose(close=False)
+    results = {'read': [], 'write': [], 'read_errors': 0, 'write_errors': 0}
+    barrier.wait()
+    deadline = time.monotonic() + args.seconds
+    threads = [
+        threading.Thread(target=client_loop, args=(app_module, first_user + i, args, deadline, results))
+        for i in range(args.threads)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    queue.put(results)
+
+
+def run_profile(args):
+    """Seed a fresh database, drive the mixed load and print the summary as JSON"""
+    users = args.processes * args.threads
+    with benchmark_app() as app_module:
+        with app_module.app.app_context():
+            seed(app_module, users, args.seed_entries)
+            app_module.db.engine.dispose()
+
+        context = multiprocessing.get_context('fork')
+        barrier = context.Barrier(args.processes)
+        queue = context.Queue()
+        processes = [
+            context.Process(target=worker, args=(app_module, 1 + p * args.threads, args, barrier, queue))
+            for p in range(args.processes)
+        ]
+        for process in processes:
+            process.start()
+        totals = {'read': [], 'write': [], 'read_errors': 0, 'write_errors': 0}
+        for _ in processes:
+            results = queue.get()
+            for key, value in results.items():
+                totals[key] += value
+        for process in processes:
+            process.join()
+
+    print(json.dumps({
+        'reads_per_second': round(len(totals['read']) / args.seconds, 1),
+        'writes_per_second': round(len(totals['write']) / args.seconds, 1),
+        'read_errors': totals['read_errors'],
+        'write_errors': totals['write_errors'],
+        'read_ms_p50': percentile(totals['read'], 0.5),
+        'read_ms_p95': percentile(totals['read'], 0.95),
+        'write_ms_p50': percentile(totals['write'], 0.5),
+        'write_ms_p95': percentile(totals['write'], 0.95),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--processes', type=int, default=4, help='forked worker processes')
+    parser.add_argument('--threads', type=int, default=8, help='client threads per worker')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--write-ratio', type=float, default=0.2, help='fraction of requests that are journal writes')
+    parser.add_argument('--seed-entries', type=int, default=200, help='journal entries seeded per user')
+    parser.add_argument('--profile', choices=sorted(PROFILES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.profile:
+        run_profile(args)
+        return
+
+    # Each profile runs in its own interpreter because the config is read at import
+    summary = {
+        'processes': args.processes,
+        'threads_per_process': args.threads,
+        'write_ratio': args.write_ratio,
+    }
+    for name, overrides in PROFILES.items():
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), *sys.argv[1:], '--profile', name],
+            env={**os.environ, **overrides}, capture_output=True, text=True, check=True
+        ).stdout
+        summary[name] = json.loads(output.strip().splitlines()[-1])
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
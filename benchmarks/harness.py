@@ -0,0 +1,64 @@
+"""
+Scaffolding shared by the benchmark scripts: the repository on sys.path, a
+throwaway SQLite database per run, and app.py imported against it.
+
+Usage from a script in this directory:
+    from harness import benchmark_app
+
+    with benchmark_app(COMMUNITY_FEED_TTL='60') as app_module, app_module.app.app_context():
+        ...
+"""
+import contextlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@contextlib.contextmanager
+def scratch_database():
+    """URL of a SQLite database in a fresh temporary directory, removed afterwards"""
+    workdir = tempfile.mkdtemp(prefix='hh-bench-')
+    try:
+        yield f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+@contextlib.contextmanager
+def benchmark_app(init=True, **environ):
+    """Import app against a scratch database, with `environ` set first since config is read at import"""
+    with scratch_database() as url:
+        os.environ['DATABASE_URL'] = url
+        os.environ.update(environ)
+        import app as app_module
+        if init:
+            app_module.init_app()
+        try:
+            yield app_module
+        finally:
+            with app_module.app.app_context():
+                app_module.db.engine.dispose()
+
+
+def mean_ms(function, cases):
+    """Mean milliseconds per call of function(*case)"""
+    start = time.perf_counter()
+    for case in cases:
+        function(*case)
+    return round((time.perf_counter() - start) * 1000 / len(cases), 3)
+
+
+def git_commit():
+    """Short hash of the checked-out commit, so results can be compared between commits"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,146 @@
+"""
+Load test for journal submissions: several forked worker processes, each
+with a few threads, POST /journal at once against one SQLite database, as
+gunicorn workers would.
+
+By default the redirect after each submission is followed on a different
+worker process, as a load balancer may route it, and that page must already
+show the new entry. Without --no-follow, every submission therefore checks
+read-your-writes across workers.
+
+Usage:
+    python benchmarks/journal_write_benchmark.py --processes 4 --threads 4 --entries 50
+"""
+import argparse
+import json
+import multiprocessing
+import sys
+import threading
+import time
+
+from harness import benchmark_app
+
+
+def logged_in_client(app_module, user_id):
+    client = app_module.app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id)
+        sess['_fresh'] = True
+    return client
+
+
+def post_entries(app_module, user_id, count, reader, failures):
+    """Log in as one user and submit `count` journal entries, checking each through `reader` if given"""
+    client = logged_in_client(app_module, user_id)
+    try:
+        for i in range(count):
+            content = f'Entry {i} of user {user_id}: went for a walk, feeling calm and a little tired'
+            response = client.post('/journal', data={'content': content, 'mood': 'neutral', 'tags': 'Self-Care'})
+            assert response.status_code == 302, response.status_code
+            if reader is not None:
+                reader.send((user_id, content))
+                assert reader.recv(), f'user {user_id} did not see entry {i} on another worker'
+    except Exception as error:
+        failures.append(error)
+        raise
+    finally:
+        # Release the reader on the other worker even if this user failed
+        if reader is not None:
+            reader.send(None)
+
+
+def serve_reads(app_module, connection):
+    """Load the journal page for another worker's submitter and report whether it shows the entry"""
+    while True:
+        request = connection.recv()
+        if request is None:
+            return
+        user_id, content = request
+        page = logged_in_client(app_module, user_id).get('/journal').get_data(as_text=True)
+        connection.send(content in page)
+
+
+def worker(app_module, index, args, barrier, pipes):
+    """One forked worker process serving `args.threads` users, and the page loads after the previous worker's"""
+    with app_module.app.app_context():
+        # Connections inherited from the parent must not be reused after fork
+        app_module.db.engine.dispose(close=False)
+
+    first_user = 1 + index * args.threads
+    failures = []
+    threads = [
+        threading.Thread(target=post_entries, args=(app_module, first_user + i, args.entries,
+                                                    None if args.no_follow else pipes[index][i][0], failures))
+        for i in range(args.threads)
+    ]
+    if not args.no_follow:
+        previous = pipes[(index - 1) % args.processes]
+        threads += [threading.Thread(target=serve_reads, args=(app_module, ends[1])) for ends in previous]
+    barrier.wait()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if failures:
+        sys.exit(1)
+
+
+def run(app_module, args):
+    """Entries per second across all workers"""
+    context = multiprocessing.get_context('fork')
+    barrier = context.Barrier(args.processes + 1)
+    # One pipe per user from its worker to the next one, which serves its page loads
+    pipes = [[context.Pipe() for _ in range(args.threads)] for _ in range(args.processes)]
+    processes = [
+        context.Process(target=worker, args=(app_module, p, args, barrier, pipes))
+        for p in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0, process.exitcode
+    total = args.processes * args.threads * args.entries
+    return round(total / (time.perf_counter() - start), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--processes', type=int, default=4, help='forked worker processes')
+    parser.add_argument('--threads', type=int, default=4, help='concurrent users per worker')
+    parser.add_argument('--entries', type=int, default=50, help='entries per user')
+    parser.add_argument('--no-follow', action='store_true',
+                        help='submit only, without loading the journal page on another worker after each entry')
+    args = parser.parse_args()
+
+    users = args.processes * args.threads
+    with benchmark_app() as app_module:
+        with app_module.app.app_context():
+            with app_module.db.engine.begin() as connection:
+                connection.execute(app_module.User.__table__.insert(), [
+                    {'username': f'user{i}', 'email': f'user{i}@example.com', 'password_hash': 'x'}
+                    for i in range(users)
+                ])
+            # Forked workers must not inherit open connections
+            app_module.db.engine.dispose()
+
+        entries_per_second = run(app_module, args)
+
+        with app_module.app.app_context():
+            stored = app_module.JournalEntry.query.count()
+            counted = app_module.db.session.query(app_module.db.func.sum(app_module.UserStats.total_entries)).scalar()
+
+    print(json.dumps({
+        'processes': args.processes,
+        'threads_per_process': args.threads,
+        'entries_per_user': args.entries,
+        'journal_page_on_another_worker_after_each_entry': not args.no_follow,
+        'all_entries_stored': stored == counted == users * args.entries,
+        'entries_per_second': entries_per_second,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+"""
+Load test for the main endpoints against a seeded SQLite database, with
+the Groq API replaced by the mock backend from llm_backends.py, or by
+recorded responses replayed with their original timing (--replay).
+
+Seeds N users with M journal entries and progress rows, then drives each
+endpoint at the target concurrency and prints throughput and p50/p95/p99
+latency per endpoint as JSON, tagged with the current git commit so runs
+can be compared between commits.
+
+Usage:
+    python benchmarks/load_test.py --users 200 --entries 20000 --concurrency 16 --requests 400
+    python benchmarks/load_test.py --endpoints generate_plan --llm-latency 1.5 --llm-429-rate 0.1
+    python benchmarks/load_test.py --endpoints generate_plan_stream --replay llm_recordings
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+from harness import benchmark_app, git_commit
+from llm_backends import MockTransport, ReplayTransport
+
+MOODS = ['happy', 'neutral', 'sad', 'anxious', 'hopeful']
+SITUATIONS = [
+    'We broke up after three years and I keep checking their profile',
+    'My partner moved abroad and ended things over a phone call',
+    'I ended it but I still feel guilty and lonely every evening',
+    'They cheated on me and now I cannot trust anyone',
+]
+
+
+def endpoint_requests():
+    """name -> function(client, rng) issuing one request"""
+    def situation(rng):
+        # A unique suffix keeps the response cache from answering repeat requests
+        return f"{rng.choice(SITUATIONS)} ({rng.getrandbits(48):x})"
+
+    return {
+        'index': lambda client, rng: client.get('/'),
+        'dashboard': lambda client, rng: client.get('/dashboard'),
+        'journal': lambda client, rng: client.get('/journal'),
+        'journal_post': lambda client, rng: client.post('/journal', data={
+            'content': 'Went for a walk today, feeling a little calmer', 'mood': rng.choice(MOODS)
+        }),
+        'analyze': lambda client, rng: client.post('/analyze', json={
+            'text': rng.choice(SITUATIONS) + ', but I feel hopeful and stronger'
+        }),
+        'generate_plan': lambda client, rng: client.post('/generate_plan', data={
+            'user_input': situation(rng), 'plan_type': '7day'
+        }),
+        'generate_plan_stream': lambda client, rng: client.post('/generate_plan/stream', data={
+            'user_input': situation(rng), 'plan_type': '7day'
+        }),
+    }
+
+
+def seed(app_module, users, entries):
+    """Users plus `entries` journal entries and progress rows spread across them"""
+    db = app_module.db
+    now = datetime.utcnow()
+    rng = random.Random(42)
+    with db.engine.begin() as connection:
+        connection.execute(app_module.User.__table__.insert(), [
+            {'username': f'user{i}', 'email': f'user{i}@example.com', 'password_hash': 'x'}
+            for i in range(users)
+        ])
+        for start in range(0, entries, 20000):
+            rows = []
+            progress_rows = []
+            for _ in range(min(20000, entries - start)):
+                user_id = rng.randint(1, users)
+                created_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+                rows.append({'user_id': user_id, 'content': 'Seeded journal entry', 'mood': rng.choice(MOODS),
+                             'tags': 'Growth', 'created_at': created_at})
+                progress_rows.append({'user_id': user_id, 'date': created_at.date(),
+                                      'mood_score': rng.randint(1, 10), 'activity_score': 6, 'social_score': 5})
+            connection.execute(app_module.JournalEntry.__table__.insert(), rows)
+            connection.execute(app_module.Progress.__table__.insert(), progress_rows)
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of sorted samples, in milliseconds"""
+    if not samples:
+        return None
+    index = min(len(samples) - 1, max(0, int(round(fraction * len(samples) + 0.5)) - 1))
+    return round(samples[index] * 1000, 2)
+
+
+def drive(app_module, issue, args):
+    """Send args.requests requests from args.concurrency threads; return the endpoint summary"""
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    remaining = iter(range(args.requests))
+
+    def client_loop(user_id):
+        client = app_module.app.test_client()
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(user_id)
+            sess['_fresh'] = True
+        rng = random.Random(user_id)
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            start = time.perf_counter()
+            response = issue(client, rng)
+            response.get_data()
+            response.close()
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    threads = [
+        threading.Thread(target=client_loop, args=(1 + i % args.users,))
+        for i in range(args.concurrency)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': sum(count for status, count in statuses.items() if status >= 500),
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': percentile(latencies, 0.50),
+        'p95_ms': percentile(latencies, 0.95),
+        'p99_ms': percentile(latencies, 0.99),
+    }
+
+
+def main():
+    endpoints = endpoint_requests()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--entries', type=int, default=20000, help='journal entries and progress rows in total')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=400, help='requests per endpoint')
+    parser.add_argument('--endpoints', nargs='+', choices=sorted(endpoints),
+                        default=['index', 'dashboard', 'journal', 'analyze', 'generate_plan'])
+    parser.add_argument('--llm-latency', type=float, default=0.5, help='mean mock Groq latency in seconds')
+    parser.add_argument('--llm-error-rate', type=float, default=0.0, help='fraction of calls answered with HTTP 500')
+    parser.add_argument('--llm-429-rate', type=float, default=0.0, help='fraction of calls answered with HTTP 429')
+    parser.add_argument('--llm-timeout-rate', type=float, default=0.0,
+                        help='fraction of calls held until the client times out')
+    parser.add_argument('--replay', metavar='DIR', help='replay responses recorded with LLM_BACKEND=record instead')
+    parser.add_argument('--real-budgets', action='store_true',
+                        help='keep the configured Groq request/token budgets instead of lifting them')
+    parser.add_argument('--output', help='write the JSON report to this file as well')
+    args = parser.parse_args()
+
+    environ = {'LLM_CACHE_ENABLED': 'false'}
+    if not args.real_budgets:
+        environ.update(GROQ_REQUESTS_PER_MINUTE=str(10 ** 9), GROQ_TOKENS_PER_DAY=str(10 ** 12))
+    os.environ.setdefault('GROQ_API_KEY', 'fake-key')
+
+    with benchmark_app(**environ) as app_module:
+        # Blocking plan generation; the streaming endpoint is measured separately
+        app_module.app.config['STREAM_RESULTS'] = False
+        app_module.app.logger.disabled = True
+
+        if args.replay:
+            backend = ReplayTransport(args.replay)
+        else:
+            backend = MockTransport(latency=args.llm_latency, error_rate=args.llm_error_rate,
+                                    rate_limit_rate=args.llm_429_rate, timeout_rate=args.llm_timeout_rate, seed=1)
+        # Drop any cached agents first; invalidate_agents() also closes the shared client
+        app_module.invalidate_agents()
+        app_module._HTTP_CLIENT = httpx.Client(transport=backend,
+                                              timeout=httpx.Timeout(app_module.llm_http_timeout()))
+        app_module._HTTP_CLIENT_PID = os.getpid()
+
+        with app_module.app.app_context():
+            start = time.perf_counter()
+            seed(app_module, args.users, args.entries)
+            seed_seconds = round(time.perf_counter() - start, 1)
+
+        results = {}
+        for name in args.endpoints:
+            results[name] = drive(app_module, endpoints[name], args)
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        'config': {key: value for key, value in vars(args).items() if key != 'output'},
+        'seed_seconds': seed_seconds,
+        'llm_backend': backend.stats,
+        'endpoints': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Microbenchmark for the `markdown` template filter on the fallback corpus:
+plain markdown2 conversion versus the memoized render_markdown.
+
+Usage:
+    python benchmarks/markdown_benchmark.py --rounds 200
+"""
+import argparse
+import json
+import time
+
+from harness import benchmark_app
+
+
+def time_renders(render, corpus, rounds):
+    """Mean microseconds per document"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in corpus:
+            render(text)
+    return round((time.perf_counter() - start) * 1e6 / (rounds * len(corpus)), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=200)
+    args = parser.parse_args()
+
+    import markdown2
+
+    with benchmark_app(init=False) as app_module, app_module.app.app_context():
+        corpus = [
+            text
+            for plan_type in app_module.PLAN_TYPES
+            for text in app_module.get_fallback_responses('', plan_type).values()
+        ]
+        uncached = time_renders(
+            lambda text: markdown2.markdown(text, extras=app_module.MARKDOWN_EXTRAS), corpus, args.rounds
+        )
+        cached = time_renders(app_module.markdown_filter, corpus, args.rounds)
+
+    print(json.dumps({
+        'documents': len(corpus),
+        'rounds': args.rounds,
+        'us_per_render_uncached': uncached,
+        'us_per_render_cached': cached,
+        'speedup': round(uncached / cached, 1),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
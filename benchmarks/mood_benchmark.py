@@ -0,0 +1,98 @@
+"""
+Benchmark analyze_mood on long multi-KB journal entries against the
+original per-call implementation, and check both agree on every text.
+
+Usage:
+    python benchmarks/mood_benchmark.py --entries 2000 --kb 4
+"""
+import argparse
+import json
+import random
+import time
+
+from harness import benchmark_app
+
+
+def analyze_mood_baseline(text):
+    """The analyzer as it was before it was precompiled"""
+    text_lower = text.lower()
+    positive_words = {
+        'happy', 'better', 'improving', 'hope', 'healing', 'strong',
+        'good', 'great', 'awesome', 'excited', 'peace', 'calm',
+        'grateful', 'love', 'joy', 'confident', 'optimistic',
+        'proud', 'won', 'success', 'growth', 'smile', 'laugh'
+    }
+    negative_words = {
+        'sad', 'pain', 'hurt', 'lonely', 'depressed', 'angry',
+        'bad', 'worse', 'broken', 'confused', 'lost', 'tears',
+        'anxious', 'afraid', 'scared', 'hate', 'miss', 'crying',
+        'stuck', 'guilty', 'ashamed', 'regret', 'dark', 'tired'
+    }
+    import string
+    translator = str.maketrans('', '', string.punctuation)
+    clean_text = text_lower.translate(translator)
+    crisis_keywords = {
+        'die', 'suicide', 'kill', 'end it', 'no point', 'give up',
+        'death', 'hurt myself', 'tired of life', 'quit life', 'dead'
+    }
+    if any(keyword in clean_text for keyword in crisis_keywords):
+        return "crisis"
+    words = clean_text.split()
+    pos_count = sum(1 for word in words if word in positive_words)
+    neg_count = sum(1 for word in words if word in negative_words)
+    if pos_count > neg_count:
+        return "improving"
+    elif neg_count > pos_count:
+        return "struggling"
+    else:
+        return "neutral"
+
+
+def make_corpus(entries, kb, seed=42):
+    """Random journal-like texts of roughly `kb` kilobytes each, a few containing crisis phrases"""
+    rng = random.Random(seed)
+    filler = ('today I went for a walk and thought about everything that happened, '
+              'talked to my sister, cooked dinner, watched a movie').split()
+    moods = ['happy', 'better', 'hope', 'calm', 'sad', 'hurt', 'lonely', 'tired', 'miss']
+    corpus = []
+    for i in range(entries):
+        words = []
+        size = 0
+        while size < kb * 1024:
+            words.append(rng.choice(moods) if rng.random() < 0.05 else rng.choice(filler))
+            size += len(words[-1]) + 1
+        if i % 50 == 0:
+            words.insert(rng.randrange(len(words)), 'I want to give up.')
+        corpus.append(' '.join(words))
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, default=2000)
+    parser.add_argument('--kb', type=int, default=4, help='approximate size of each entry')
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.entries, args.kb)
+
+    start = time.perf_counter()
+    baseline = [analyze_mood_baseline(text) for text in corpus]
+    baseline_seconds = time.perf_counter() - start
+
+    with benchmark_app(init=False) as app_module:
+        start = time.perf_counter()
+        batched = app_module.analyze_moods(corpus)
+        batched_seconds = time.perf_counter() - start
+
+    print(json.dumps({
+        'entries': args.entries,
+        'kb_per_entry': args.kb,
+        'results_match': baseline == batched,
+        'us_per_entry_baseline': round(baseline_seconds * 1e6 / args.entries, 1),
+        'us_per_entry_compiled': round(batched_seconds * 1e6 / args.entries, 1),
+        'speedup': round(baseline_seconds / batched_seconds, 2),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark the Progress rollups on a seeded SQLite database: the backfill
+(schema migration 6), then a one-year chart read from the weekly rollups
+against grouping the raw Progress rows of that year, in SQL and in Python.
+
+Usage:
+    python benchmarks/progress_benchmark.py --users 200 --rows 1000000
+"""
+import argparse
+import json
+import random
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+from harness import benchmark_app, mean_ms
+
+CHUNK = 20000
+
+
+def seed(app_module, users, rows):
+    """Progress rows over the last two years, several per active day, written straight to the table"""
+    db = app_module.db
+    today = date.today()
+    rng = random.Random(42)
+    with db.engine.begin() as connection:
+        connection.execute(app_module.User.__table__.insert(), [
+            {'username': f'user{i}', 'email': f'user{i}@example.com', 'password_hash': 'x'}
+            for i in range(users)
+        ])
+    for start in range(0, rows, CHUNK):
+        batch = [
+            {'user_id': rng.randint(1, users), 'date': today - timedelta(days=rng.randint(0, 730)),
+             'mood_score': rng.randint(1, 10), 'activity_score': rng.randint(1, 10),
+             'social_score': rng.randint(1, 10)}
+            for _ in range(min(CHUNK, rows - start))
+        ]
+        with db.engine.begin() as connection:
+            connection.execute(app_module.Progress.__table__.insert(), batch)
+
+
+def raw_sql_year(app_module, user_id, date_from, date_to):
+    """Group the raw rows by day in SQL and fold the days into weeks in Python"""
+    Progress = app_module.Progress
+    db = app_module.db
+    days = db.session.query(Progress.date, db.func.count(), db.func.sum(Progress.mood_score))\
+        .filter(Progress.user_id == user_id, Progress.date.between(date_from, date_to))\
+        .group_by(Progress.date).all()
+    weeks = defaultdict(lambda: [0, 0])
+    for day, count, mood_sum in days:
+        week = weeks[app_module.period_start(day, 'week')]
+        week[0] += count
+        week[1] += mood_sum
+    return {week: mood_sum / count for week, (count, mood_sum) in sorted(weeks.items())}
+
+
+def raw_rows_year(app_module, user_id, date_from, date_to):
+    """Load every raw row of the year and average per week in Python"""
+    Progress = app_module.Progress
+    weeks = defaultdict(list)
+    rows = Progress.query.filter(Progress.user_id == user_id, Progress.date.between(date_from, date_to))
+    for progress in rows:
+        weeks[app_module.period_start(progress.date, 'week')].append(progress.mood_score)
+    return {week: sum(scores) / len(scores) for week, scores in sorted(weeks.items())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--samples', type=int, default=200, help='users charted per measurement')
+    args = parser.parse_args()
+
+    with benchmark_app() as app_module, app_module.app.app_context():
+        db = app_module.db
+        seed(app_module, args.users, args.rows)
+        # Pretend the database predates migration 6 and run it
+        with db.engine.begin() as connection:
+            connection.execute(app_module.SchemaVersion.__table__.update().values(version=5))
+        start = time.perf_counter()
+        app_module.migrate_database()
+        migration_seconds = round(time.perf_counter() - start, 1)
+
+        rollups = db.session.query(app_module.ProgressRollup.bucket, db.func.count())\
+            .group_by(app_module.ProgressRollup.bucket).all()
+        date_to = date.today()
+        date_from = date_to - timedelta(days=7 * 51)
+        rng = random.Random(7)
+        cases = [(rng.randint(1, args.users), date_from, date_to) for _ in range(args.samples)]
+        points = len(app_module.progress_series(cases[0][0], 'week', date_from, date_to)['labels'])
+
+        def run(function):
+            def call(*case):
+                function(*case)
+                db.session.expunge_all()
+            return call
+
+        results = {
+            'weekly_rollups': mean_ms(run(lambda user_id, date_from, date_to: app_module.progress_series(
+                user_id, 'week', date_from, date_to)), cases),
+            'raw_grouped_in_sql': mean_ms(run(lambda *case: raw_sql_year(app_module, *case)), cases),
+            'raw_rows_in_python': mean_ms(run(lambda *case: raw_rows_year(app_module, *case)), cases),
+        }
+
+    print(json.dumps({
+        'users': args.users,
+        'progress_rows': args.rows,
+        'migration_seconds': migration_seconds,
+        'rollup_rows': dict(rollups),
+        'points_per_one_year_chart': points,
+        'mean_ms_per_one_year_chart': results,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
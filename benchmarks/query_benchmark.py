@@ -0,0 +1,116 @@
+"""
+Benchmark the hot per-user queries on a seeded SQLite database,
+with and without the composite indexes from schema migration 1.
+
+Usage:
+    python benchmarks/query_benchmark.py --users 1000 --entries 1000000
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from harness import benchmark_app
+
+MOODS = ['happy', 'neutral', 'sad']
+CHUNK = 20000
+
+
+def seed(app_module, users, entries):
+    """Insert users plus one journal entry and one progress row per entry"""
+    db = app_module.db
+    user_table = app_module.User.__table__
+    entry_table = app_module.JournalEntry.__table__
+    progress_table = app_module.Progress.__table__
+    now = datetime.utcnow()
+
+    with db.engine.begin() as connection:
+        connection.execute(user_table.insert(), [
+            {'username': f'user{i}', 'email': f'user{i}@example.com', 'password_hash': 'x'}
+            for i in range(users)
+        ])
+
+    rng = random.Random(42)
+    for start in range(0, entries, CHUNK):
+        count = min(CHUNK, entries - start)
+        rows = []
+        progress_rows = []
+        for _ in range(count):
+            user_id = rng.randint(1, users)
+            created_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 730))
+            mood = rng.choice(MOODS)
+            rows.append({'user_id': user_id, 'content': 'Benchmark entry', 'mood': mood,
+                         'tags': '', 'created_at': created_at})
+            progress_rows.append({'user_id': user_id, 'date': created_at.date(),
+                                  'mood_score': 5, 'activity_score': 6, 'social_score': 5})
+        with db.engine.begin() as connection:
+            connection.execute(entry_table.insert(), rows)
+            connection.execute(progress_table.insert(), progress_rows)
+
+
+def time_queries(app_module, user_ids):
+    """Mean milliseconds per call for each hot query across the sampled users"""
+    JournalEntry = app_module.JournalEntry
+    Progress = app_module.Progress
+    User = app_module.User
+
+    queries = {
+        'dashboard_recent_entries': lambda uid: JournalEntry.query.filter_by(user_id=uid)
+            .order_by(JournalEntry.created_at.desc()).limit(5).all(),
+        'dashboard_progress': lambda uid: Progress.query.filter_by(user_id=uid)
+            .order_by(Progress.date.desc()).limit(7).all(),
+        'journal_listing': lambda uid: JournalEntry.query.filter_by(user_id=uid)
+            .order_by(JournalEntry.created_at.desc()).all(),
+        'user_by_email': lambda uid: User.query.filter_by(email=f'user{uid}@example.com').first(),
+    }
+
+    results = {}
+    for name, query in queries.items():
+        start = time.perf_counter()
+        for uid in user_ids:
+            query(uid)
+            app_module.db.session.expunge_all()
+        results[name] = round((time.perf_counter() - start) * 1000 / len(user_ids), 3)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--entries', type=int, default=1000000)
+    parser.add_argument('--samples', type=int, default=200, help='users queried per measurement')
+    args = parser.parse_args()
+
+    with benchmark_app() as app_module, app_module.app.app_context():
+        start = time.perf_counter()
+        seed(app_module, args.users, args.entries)
+        seed_seconds = round(time.perf_counter() - start, 1)
+
+        rng = random.Random(7)
+        user_ids = [rng.randint(1, args.users) for _ in range(args.samples)]
+        indexes = [
+            index for model in (app_module.JournalEntry, app_module.Progress)
+            for index in model.__table__.indexes
+        ]
+
+        with app_module.db.engine.begin() as connection:
+            for index in indexes:
+                index.drop(connection)
+        without_indexes = time_queries(app_module, user_ids)
+        with app_module.db.engine.begin() as connection:
+            for index in indexes:
+                index.create(connection)
+        with_indexes = time_queries(app_module, user_ids)
+
+    print(json.dumps({
+        'users': args.users,
+        'entries': args.entries,
+        'seed_seconds': seed_seconds,
+        'ms_per_query_without_indexes': without_indexes,
+        'ms_per_query_with_indexes': with_indexes,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmark journal search on a seeded SQLite database: the FTS5 index from
+schema migration 4 against the LIKE '%word%' scan it replaces, for the same
+users, words and filters.
+
+Usage:
+    python benchmarks/search_benchmark.py --users 200 --entries 1000000
+"""
+import argparse
+import itertools
+import json
+import random
+import statistics
+import time
+from datetime import date, datetime, timedelta
+
+from harness import benchmark_app
+
+CHUNK = 20000
+MOODS = ['happy', 'neutral', 'sad', 'anxious', 'hopeful']
+COMMON = (
+    'today felt heavy lonely calm hopeful tired angry walk run yoga friend family call text message '
+    'memory photo song coffee rain sleep dream cried laughed work office weekend trip beach temple '
+    'festival diwali breathing meditation therapist letter closure anxious better worse healing strong '
+    'sister brother mother father colleague movie book journal morning evening night promise trust'
+).split()
+
+
+def vocabulary(size=20000):
+    """Common words followed by made-up rarer ones, with cumulative Zipf-like weights as in real text"""
+    rng = random.Random(1)
+    words = COMMON + [
+        ''.join(rng.choice('abcdefghijklmnoprstuvwy') for _ in range(rng.randint(4, 9)))
+        for _ in range(size - len(COMMON))
+    ]
+    return words, list(itertools.accumulate(1 / (rank + 1) for rank in range(len(words))))
+
+
+def seed(app_module, users, entries):
+    """Users plus `entries` journal entries of 20-60 random words, indexed by the FTS triggers"""
+    db = app_module.db
+    now = datetime.utcnow()
+    rng = random.Random(42)
+    words, cumulative_weights = vocabulary()
+    with db.engine.begin() as connection:
+        connection.execute(app_module.User.__table__.insert(), [
+            {'username': f'user{i}', 'email': f'user{i}@example.com', 'password_hash': 'x'}
+            for i in range(users)
+        ])
+    for start in range(0, entries, CHUNK):
+        rows = [
+            {'user_id': rng.randint(1, users), 'mood': rng.choice(MOODS), 'tags': 'Growth',
+             'content': ' '.join(rng.choices(words, cum_weights=cumulative_weights, k=rng.randint(20, 60))),
+             'created_at': now - timedelta(minutes=rng.randint(0, 60 * 24 * 730))}
+            for _ in range(min(CHUNK, entries - start))
+        ]
+        with db.engine.begin() as connection:
+            connection.execute(app_module.JournalEntry.__table__.insert(), rows)
+
+
+def like_search(app_module, user_id, text, mood, date_from, limit=20):
+    """The pre-FTS way: substring scan over the user's entries for every word, newest first"""
+    JournalEntry = app_module.JournalEntry
+    query = JournalEntry.query.filter(JournalEntry.user_id == user_id,
+                                      *(JournalEntry.content.like(f'%{word}%') for word in text.split()))
+    if mood:
+        query = query.filter(JournalEntry.mood == mood)
+    if date_from:
+        query = query.filter(JournalEntry.created_at >= datetime.combine(date_from, datetime.min.time()))
+    return query.order_by(JournalEntry.created_at.desc()).limit(limit).all()
+
+
+def time_ms(function, cases):
+    """Median and p95 milliseconds of function(*case) over the cases"""
+    samples = []
+    for case in cases:
+        start = time.perf_counter()
+        function(*case)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {'p50_ms': round(statistics.median(samples), 3), 'p95_ms': round(samples[int(len(samples) * 0.95)], 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--entries', type=int, default=200000)
+    parser.add_argument('--samples', type=int, default=200, help='searches per measurement')
+    args = parser.parse_args()
+
+    with benchmark_app() as app_module, app_module.app.app_context():
+        start = time.perf_counter()
+        seed(app_module, args.users, args.entries)
+        seed_seconds = round(time.perf_counter() - start, 1)
+
+        rng = random.Random(7)
+        words = vocabulary()[0][:2000]  # searches use words from common to fairly rare
+        recent = date.today() - timedelta(days=90)
+        cases = {
+            'one_word': [(rng.randint(1, args.users), rng.choice(words), None, None) for _ in range(args.samples)],
+            'two_words': [(rng.randint(1, args.users), ' '.join(rng.sample(words, 2)), None, None)
+                          for _ in range(args.samples)],
+            'word_mood_last_90_days': [(rng.randint(1, args.users), rng.choice(words), rng.choice(MOODS), recent)
+                                       for _ in range(args.samples)],
+        }
+
+        def fts(user_id, text, mood, date_from):
+            app_module.search_journal(user_id, text, mood=mood, date_from=date_from)
+            app_module.db.session.expunge_all()
+
+        def like(user_id, text, mood, date_from):
+            like_search(app_module, user_id, text, mood, date_from)
+            app_module.db.session.expunge_all()
+
+        results = {name: {'fts5': time_ms(fts, cases[name]), 'like_scan': time_ms(like, cases[name])}
+                   for name in cases}
+
+    print(json.dumps({
+        'users': args.users,
+        'entries': args.entries,
+        'seed_seconds': seed_seconds,
+        'searches': results,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
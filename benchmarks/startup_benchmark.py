@@ -0,0 +1,97 @@
+"""
+Cold-start benchmark for a worker: imports app.py in fresh interpreters with
+`python -X importtime` and reports the median import time, the heaviest
+modules app.py pulls in directly, and how long warm_up() (the lazily loaded
+LLM stack and markdown cache) takes on top of that.
+
+Output is JSON tagged with the current git commit so runs can be compared
+between commits. With --budget-ms the exit status is 1 when the median
+import is slower than the budget, so CI can keep it from creeping up.
+
+Usage:
+    python benchmarks/startup_benchmark.py --runs 5 --top 10
+    python benchmarks/startup_benchmark.py --budget-ms 800
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from harness import ROOT, git_commit, scratch_database
+
+WARM_UP = """
+import time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.warm_up()
+print((imported - start) * 1000, (time.perf_counter() - imported) * 1000)
+"""
+
+
+def import_times(env):
+    """{module: cumulative microseconds} for app and each module it imports directly"""
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stderr
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nesting is shown by indentation, and a module is listed after everything it imports
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        if depth == 0:
+            if name == 'app':
+                times['app'] = int(cumulative)
+                break
+            times = {}  # interpreter startup, not part of app
+        elif depth == 1:
+            times[name] = times.get(name, 0) + int(cumulative)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='heaviest direct imports to list')
+    parser.add_argument('--budget-ms', type=float, help='fail when the median import of app is slower than this')
+    args = parser.parse_args()
+
+    with scratch_database() as url:
+        env = {**os.environ, 'DATABASE_URL': url}
+        env.pop('PROMETHEUS_MULTIPROC_DIR', None)
+
+        runs = [import_times(env) for _ in range(args.runs)]
+        warm = [
+            [float(value) for value in subprocess.run([sys.executable, '-c', WARM_UP], cwd=ROOT, env=env,
+                                                      capture_output=True, text=True, check=True).stdout.split()]
+            for _ in range(args.runs)
+        ]
+
+    modules = {name for times in runs for name in times if name != 'app'}
+    heaviest = sorted(
+        ((name, statistics.median(times.get(name, 0) for times in runs) / 1000) for name in modules),
+        key=lambda item: item[1], reverse=True
+    )[:args.top]
+    import_ms = statistics.median(times['app'] for times in runs) / 1000
+
+    print(json.dumps({
+        'commit': git_commit(),
+        'python': sys.version.split()[0],
+        'runs': args.runs,
+        'import_app_ms': round(import_ms, 1),
+        'import_app_wall_ms': round(statistics.median(imported for imported, _ in warm), 1),
+        'warm_up_ms': round(statistics.median(warm_up for _, warm_up in warm), 1),
+        'heaviest_imports_ms': {name: round(ms, 1) for name, ms in heaviest},
+    }, indent=2))
+
+    if args.budget_ms is not None and import_ms > args.budget_ms:
+        print(f"Importing app took {import_ms:.0f} ms, over the {args.budget_ms:.0f} ms budget", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark the normalized journal tags on a seeded SQLite database: the bulk
+migration of comma-separated JournalEntry.tags (schema migration 5), then the
+"top tags" facet and "entries tagged X" page against loading and splitting
+the comma lists in Python.
+
+Usage:
+    python benchmarks/tag_benchmark.py --users 200 --entries 1000000
+"""
+import argparse
+import json
+import random
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from harness import benchmark_app, mean_ms
+
+CHUNK = 20000
+TAGS = ['Breakthrough', 'Memories', 'Self-Care', 'Growth', 'Anxiety', 'Gratitude',
+        'family', 'work', 'sleep', 'therapy', 'friends', 'exercise']
+
+
+def seed(app_module, users, entries):
+    """Entries with comma-separated tags written straight to the table, as before migration 5"""
+    db = app_module.db
+    now = datetime.utcnow()
+    rng = random.Random(42)
+    with db.engine.begin() as connection:
+        connection.execute(app_module.User.__table__.insert(), [
+            {'username': f'user{i}', 'email': f'user{i}@example.com', 'password_hash': 'x'}
+            for i in range(users)
+        ])
+    for start in range(0, entries, CHUNK):
+        rows = [
+            {'user_id': rng.randint(1, users), 'content': 'Seeded entry', 'mood': 'neutral',
+             'tags': ', '.join(rng.sample(TAGS, rng.randint(0, 3))),
+             'created_at': now - timedelta(minutes=rng.randint(0, 60 * 24 * 730))}
+            for _ in range(min(CHUNK, entries - start))
+        ]
+        with db.engine.begin() as connection:
+            connection.execute(app_module.JournalEntry.__table__.insert(), rows)
+
+
+def split_top_tags(app_module, user_id):
+    """The pre-migration way: load every tag list of the user and count in Python"""
+    counts = Counter()
+    rows = app_module.db.session.query(app_module.JournalEntry.tags)\
+        .filter(app_module.JournalEntry.user_id == user_id)
+    for (tags,) in rows:
+        counts.update(tag.strip() for tag in (tags or '').split(',') if tag.strip())
+    return counts.most_common(20)
+
+
+def split_tagged_page(app_module, user_id, tag, limit=20):
+    """The pre-migration way: walk the user's entries newest first until a page carries the tag"""
+    JournalEntry = app_module.JournalEntry
+    page = []
+    rows = JournalEntry.query.filter(JournalEntry.user_id == user_id)\
+        .order_by(JournalEntry.created_at.desc()).yield_per(500)
+    for entry in rows:
+        if tag in (t.strip() for t in (entry.tags or '').split(',')):
+            page.append(entry)
+            if len(page) == limit:
+                break
+    return page
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--entries', type=int, default=200000)
+    parser.add_argument('--samples', type=int, default=200, help='users queried per measurement')
+    args = parser.parse_args()
+
+    with benchmark_app() as app_module, app_module.app.app_context():
+        db = app_module.db
+        seed(app_module, args.users, args.entries)
+        # Pretend the database predates migration 5 and run it
+        with db.engine.begin() as connection:
+            connection.execute(app_module.SchemaVersion.__table__.update().values(version=4))
+        start = time.perf_counter()
+        app_module.migrate_database()
+        migration_seconds = round(time.perf_counter() - start, 1)
+
+        links = db.session.query(db.func.count()).select_from(app_module.journal_entry_tag).scalar()
+        rng = random.Random(7)
+        user_ids = [rng.randint(1, args.users) for _ in range(args.samples)]
+        tagged = [(user_id, rng.choice(TAGS)) for user_id in user_ids]
+
+        def run(function):
+            def call(*case):
+                function(*case)
+                db.session.expunge_all()
+            return call
+
+        results = {
+            'top_tags': {
+                'tag_counts': mean_ms(run(app_module.top_tags), [(user_id,) for user_id in user_ids]),
+                'split_in_python': mean_ms(run(lambda user_id: split_top_tags(app_module, user_id)),
+                                           [(user_id,) for user_id in user_ids]),
+            },
+            'tagged_page': {
+                'tag_tables': mean_ms(run(lambda user_id, tag: app_module.journal_page(user_id, tag=tag)), tagged),
+                'split_in_python': mean_ms(run(lambda user_id, tag: split_tagged_page(app_module, user_id, tag)),
+                                           tagged),
+            },
+        }
+
+    print(json.dumps({
+        'users': args.users,
+        'entries': args.entries,
+        'migration_seconds': migration_seconds,
+        'tag_links': links,
+        'mean_ms_per_call': results,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
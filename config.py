@@ -8,6 +8,26 @@ class Config:
     GROQ_API_KEY = os.getenv('GROQ_API_KEY')
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///recovery.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    
+    # SQLite profile, applied to every new connection
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))  # bytes
+    SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', '-65536'))  # negative means KiB, so 64 MiB
+    
+    # Connection pool bounds per worker for server databases (Postgres)
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '5'))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '10'))  # seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))  # seconds
+    SQLALCHEMY_ENGINE_OPTIONS = {} if SQLALCHEMY_DATABASE_URI.startswith('sqlite') else {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_pre_ping': True
+    }
     UPLOAD_FOLDER = 'uploads'
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     SESSION_COOKIE_SECURE = True
@@ -22,4 +42,62 @@ class Config:
     # Feature flags
     ENABLE_JOURNAL = True
     ENABLE_COMMUNITY = True
-    ENABLE_PROGRESS_TRACKING = True
\ No newline at end of file
+    ENABLE_PROGRESS_TRACKING = True
+    
+    # Homepage stats snapshot, rebuilt from shared counters at most this often per worker
+    HOMEPAGE_STATS_TTL = int(os.getenv('HOMEPAGE_STATS_TTL', '60'))  # seconds
+    
+    # Browser/CDN lifetime of the pre-rendered static pages (about, privacy, terms, resources, contact)
+    PAGE_CACHE_MAX_AGE = int(os.getenv('PAGE_CACHE_MAX_AGE', '3600'))  # seconds
+    
+    # Link templates to the fingerprinted files from `flask build-assets` when they exist
+    STATIC_FINGERPRINTING = os.getenv('STATIC_FINGERPRINTING', 'true').lower() == 'true'
+    
+    # Pagination
+    JOURNAL_PAGE_SIZE = int(os.getenv('JOURNAL_PAGE_SIZE', '20'))
+    
+    # Community feed: first page and sidebar numbers cached per worker until a new post or the TTL
+    COMMUNITY_PAGE_SIZE = int(os.getenv('COMMUNITY_PAGE_SIZE', '10'))
+    COMMUNITY_FEED_TTL = int(os.getenv('COMMUNITY_FEED_TTL', '5'))  # seconds
+    # Hearts and hugs are merged in memory per worker and written every N ms
+    COMMUNITY_REACTION_FLUSH_MS = int(os.getenv('COMMUNITY_REACTION_FLUSH_MS', '1000'))
+    
+    # AI agent settings
+    GROQ_MODEL_ID = os.getenv('GROQ_MODEL_ID', 'llama-3.1-8b-instant')
+    LLM_MAX_CONNECTIONS = int(os.getenv('LLM_MAX_CONNECTIONS', '20'))
+    LLM_KEEPALIVE_EXPIRY = float(os.getenv('LLM_KEEPALIVE_EXPIRY', '30'))
+    LLM_HTTP_TIMEOUT = float(os.getenv('LLM_HTTP_TIMEOUT', '60'))  # capped at AGENT_TIMEOUT
+    
+    # Model backend: groq (live API), mock (local canned answers), record (live API, every
+    # exchange saved to LLM_RECORDINGS_DIR) or replay (saved exchanges with their original timing)
+    LLM_BACKEND = os.getenv('LLM_BACKEND', 'groq').lower()
+    LLM_BASE_URL = os.getenv('LLM_BASE_URL')  # e.g. http://127.0.0.1:8001 for `flask mock-llm`
+    LLM_RECORDINGS_DIR = os.getenv('LLM_RECORDINGS_DIR', 'llm_recordings')
+    LLM_REPLAY_STRICT = os.getenv('LLM_REPLAY_STRICT', 'false').lower() == 'true'
+    MOCK_LLM_LATENCY = float(os.getenv('MOCK_LLM_LATENCY', '0.5'))  # mean seconds per call
+    MOCK_LLM_ERROR_RATE = float(os.getenv('MOCK_LLM_ERROR_RATE', '0'))
+    MOCK_LLM_429_RATE = float(os.getenv('MOCK_LLM_429_RATE', '0'))
+    MOCK_LLM_TIMEOUT_RATE = float(os.getenv('MOCK_LLM_TIMEOUT_RATE', '0'))
+    AGENT_FANOUT = os.getenv('AGENT_FANOUT', 'true').lower() == 'true'
+    AGENT_TIMEOUT = float(os.getenv('AGENT_TIMEOUT', '6'))  # overall deadline in seconds
+    AGENT_POOL_SIZE = int(os.getenv('AGENT_POOL_SIZE', '16'))
+    STREAM_RESULTS = os.getenv('STREAM_RESULTS', 'true').lower() == 'true'
+    # Keep well below the gunicorn worker timeout (GUNICORN_TIMEOUT, 120 s by default)
+    AGENT_STREAM_TIMEOUT = float(os.getenv('AGENT_STREAM_TIMEOUT', '30'))
+    
+    # Groq budgets, shared by all workers (defaults match the free tier for llama-3.1-8b-instant)
+    GROQ_REQUESTS_PER_MINUTE = int(os.getenv('GROQ_REQUESTS_PER_MINUTE', '30'))
+    GROQ_TOKENS_PER_DAY = int(os.getenv('GROQ_TOKENS_PER_DAY', '500000'))
+    GROQ_TOKENS_PER_CALL = int(os.getenv('GROQ_TOKENS_PER_CALL', '1200'))  # estimate per agent call
+    RATE_LIMIT_DEFAULT_BACKOFF = int(os.getenv('RATE_LIMIT_DEFAULT_BACKOFF', '60'))  # seconds, when no reset is given
+    
+    # LLM response cache
+    LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+    LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', str(7 * 24 * 3600)))  # seconds
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '5000'))
+    
+    # Rendered markdown kept in memory per worker (fallback texts are pre-rendered at startup)
+    MARKDOWN_CACHE_SIZE = int(os.getenv('MARKDOWN_CACHE_SIZE', '512'))
+    
+    # Generated plans are stored server-side; only their id goes in the session cookie
+    PLAN_RESULT_TTL_DAYS = int(os.getenv('PLAN_RESULT_TTL_DAYS', '30'))
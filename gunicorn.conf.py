@@ -0,0 +1,50 @@
+"""Gunicorn settings, picked up automatically by `gunicorn app:app`"""
+import os
+import shutil
+import subprocess
+import sys
+
+# Import the app once in the master so workers fork with the LLM stack and caches already loaded
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+# Threaded workers keep heartbeating while a request thread streams a plan. A sync worker
+# doesn't, and gets killed after `timeout` seconds mid-stream, before the fallback and
+# save_plan_result run. AGENT_STREAM_TIMEOUT must stay well below `timeout` (see on_starting).
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = timeout
+# Time left after the stream deadline for the fallback responses and saving the result
+STREAM_TIMEOUT_MARGIN = 30
+
+
+def on_starting(server):
+    """Reset the metrics directory, then migrate the schema and warm the app once for all workers"""
+    path = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+
+    from config import Config
+    stream_timeout = Config.AGENT_STREAM_TIMEOUT
+    if stream_timeout + STREAM_TIMEOUT_MARGIN > server.cfg.timeout:
+        server.log.warning(
+            'AGENT_STREAM_TIMEOUT (%ss) leaves less than %ss before the %ss worker timeout; '
+            'a slow plan stream can be killed before its fallback is saved',
+            stream_timeout, STREAM_TIMEOUT_MARGIN, server.cfg.timeout
+        )
+    if server.cfg.preload_app:
+        from app import init_app, warm_up
+        init_app()
+        warm_up()
+    else:
+        # Without preloading, each worker imports the app itself after forking; importing it
+        # here too would only load the LLM stack into a master that never serves a request
+        subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'migrate'], cwd=server.cfg.chdir, check=True)
+
+
+def child_exit(server, worker):
+    """Drop a dead worker's live samples from the aggregated /metrics"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
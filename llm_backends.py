@@ -0,0 +1,346 @@
+"""
+Model backends for the Groq client used by the agents.
+
+    groq    the live API (default)
+    mock    canned answers generated locally after a configurable latency,
+            with optional 500, 429 and timeout rates
+    record  the live API, with every exchange saved to LLM_RECORDINGS_DIR
+    replay  saved exchanges played back with their original timing
+
+Each backend is an httpx transport, so agno and the groq SDK run unchanged.
+`serve` exposes any of them as an OpenAI/Groq-compatible HTTP server for
+processes that point LLM_BASE_URL at it (see `flask mock-llm`).
+"""
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+
+import httpx
+
+BACKENDS = ('groq', 'mock', 'record', 'replay')
+GROQ_API_URL = 'https://api.groq.com'
+
+MOCK_ANSWER = """## Coping Strategies
+
+- Give yourself permission to grieve; healing is not linear.
+- Keep a simple routine: sleep, meals, a short walk every day.
+- Reach out to one friend or family member this week.
+
+## Next Steps
+
+1. Write an unsent letter and let it go.
+2. Try 5 minutes of box breathing each morning.
+3. Notice one small joy before bed.
+"""
+
+# Response headers worth keeping in a recording; the rest describe the original connection
+RECORDED_HEADERS = ('content-type', 'retry-after', 'x-ratelimit-limit-requests', 'x-ratelimit-remaining-requests',
+                    'x-ratelimit-reset-requests', 'x-ratelimit-limit-tokens', 'x-ratelimit-remaining-tokens',
+                    'x-ratelimit-reset-tokens')
+
+
+def make_transport(config, limits=None):
+    """The transport for config['LLM_BACKEND'], or None to let httpx talk to the network directly"""
+    backend = config['LLM_BACKEND']
+    if backend not in BACKENDS:
+        raise ValueError(f"LLM_BACKEND must be one of {', '.join(BACKENDS)}, not {backend!r}")
+    if backend == 'mock':
+        return MockTransport(
+            latency=config['MOCK_LLM_LATENCY'],
+            error_rate=config['MOCK_LLM_ERROR_RATE'],
+            rate_limit_rate=config['MOCK_LLM_429_RATE'],
+            timeout_rate=config['MOCK_LLM_TIMEOUT_RATE']
+        )
+    if backend == 'record':
+        return RecordingTransport(config['LLM_RECORDINGS_DIR'], httpx.HTTPTransport(limits=limits or httpx.Limits()))
+    if backend == 'replay':
+        return ReplayTransport(config['LLM_RECORDINGS_DIR'], strict=config['LLM_REPLAY_STRICT'])
+    return None
+
+
+def request_key(request, body):
+    """Stable name for an exchange: the endpoint plus the full request body"""
+    canonical = json.dumps({'path': request.url.path, 'body': body}, sort_keys=True)
+    return hashlib.sha256(canonical.encode()).hexdigest()[:32]
+
+
+def read_body(request):
+    content = request.read()
+    return json.loads(content) if content else {}
+
+
+def read_timeout(request, default=60.0):
+    """The client's read timeout for this request, as httpx passes it to the transport"""
+    timeout = request.extensions.get('timeout') or {}
+    return timeout.get('read') or default
+
+
+# ------------------------------
+# Mock
+# ------------------------------
+class MockTransport(httpx.BaseTransport):
+    """Answers /chat/completions after `latency` seconds, failing at the given rates"""
+
+    def __init__(self, latency=0.5, jitter=0.2, error_rate=0.0, rate_limit_rate=0.0, timeout_rate=0.0,
+                 retry_after=1, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.timeout_rate = timeout_rate
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {'calls': 0, 'ok': 0, 'errors': 0, 'rate_limited': 0, 'timeouts': 0}
+
+    def count(self, outcome):
+        with self.lock:
+            self.stats['calls'] += 1
+            self.stats[outcome] += 1
+
+    def handle_request(self, request):
+        body = read_body(request)
+        model = body.get('model')
+        with self.lock:
+            roll = self.rng.random()
+            delay = max(0.0, self.rng.gauss(self.latency, self.latency * self.jitter))
+
+        if roll < self.rate_limit_rate:
+            self.count('rate_limited')
+            return httpx.Response(429, headers={'retry-after': str(self.retry_after)}, json={'error': {
+                'message': f"Rate limit reached for model `{model}`. Please try again in {self.retry_after}s.",
+                'type': 'tokens',
+                'code': 'rate_limit_exceeded'
+            }})
+        roll -= self.rate_limit_rate
+        if roll < self.error_rate:
+            time.sleep(delay / 4)
+            self.count('errors')
+            return httpx.Response(500, json={'error': {
+                'message': 'Internal server error', 'type': 'internal_server_error'
+            }})
+        roll -= self.error_rate
+        if roll < self.timeout_rate:
+            # Hold the request until the client gives up, as a stalled upstream would
+            self.count('timeouts')
+            time.sleep(read_timeout(request))
+            raise httpx.ReadTimeout('Mock LLM did not answer in time', request=request)
+
+        self.count('ok')
+        if body.get('stream'):
+            return httpx.Response(200, headers={'content-type': 'text/event-stream'},
+                                  content=self.stream_chunks(model, delay))
+        time.sleep(delay)
+        return httpx.Response(200, json=completion(model, MOCK_ANSWER))
+
+    def stream_chunks(self, model, delay):
+        tokens = MOCK_ANSWER.split(' ')
+        pause = delay / len(tokens)
+        for i, token in enumerate(tokens):
+            time.sleep(pause)
+            text = token if i == 0 else ' ' + token
+            yield f"data: {json.dumps(chunk(model, {'content': text}))}\n\n".encode()
+        yield f"data: {json.dumps(chunk(model, {}, finish_reason='stop'))}\n\n".encode()
+        yield b"data: [DONE]\n\n"
+
+
+def usage(text):
+    completion_tokens = len(text.split())
+    return {'prompt_tokens': 300, 'completion_tokens': completion_tokens, 'total_tokens': 300 + completion_tokens}
+
+
+def completion(model, text):
+    """A non-streaming chat.completion body"""
+    return {
+        'id': 'chatcmpl-mock',
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': model,
+        'choices': [{
+            'index': 0,
+            'message': {'role': 'assistant', 'content': text},
+            'finish_reason': 'stop'
+        }],
+        'usage': usage(text)
+    }
+
+
+def chunk(model, delta, finish_reason=None):
+    """One chat.completion.chunk of a streaming response"""
+    return {
+        'id': 'chatcmpl-mock',
+        'object': 'chat.completion.chunk',
+        'created': int(time.time()),
+        'model': model,
+        'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]
+    }
+
+
+# ------------------------------
+# Record / Replay
+# ------------------------------
+class RecordingStream(httpx.SyncByteStream):
+    """Passes a response body through, noting when each chunk arrived"""
+
+    def __init__(self, stream, started, on_close):
+        self.stream = stream
+        self.started = started
+        self.on_close = on_close
+        self.chunks = []
+
+    def __iter__(self):
+        for part in self.stream:
+            # surrogateescape keeps multi-byte characters split across chunks intact
+            self.chunks.append([round(time.perf_counter() - self.started, 4),
+                                part.decode('utf-8', 'surrogateescape')])
+            yield part
+
+    def close(self):
+        self.stream.close()
+        self.on_close(self.chunks)
+
+
+class RecordingTransport(httpx.BaseTransport):
+    """Forwards to `inner` and writes each exchange to `directory` once its body has been read"""
+
+    def __init__(self, directory, inner):
+        self.directory = directory
+        self.inner = inner
+        os.makedirs(directory, exist_ok=True)
+
+    def handle_request(self, request):
+        body = read_body(request)
+        # Plain bodies, so the saved chunks can be replayed without the original encoding
+        request.headers['accept-encoding'] = 'identity'
+        started = time.perf_counter()
+        response = self.inner.handle_request(request)
+        headers = {name: response.headers[name] for name in RECORDED_HEADERS if name in response.headers}
+
+        def save(chunks):
+            record = {
+                'path': request.url.path,
+                'model': body.get('model'),
+                'stream': bool(body.get('stream')),
+                'status': response.status_code,
+                'headers': headers,
+                'chunks': chunks,
+                'request': body,
+            }
+            path = os.path.join(self.directory, request_key(request, body) + '.json')
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(record, f, indent=1)
+            os.replace(path + '.tmp', path)
+
+        return httpx.Response(response.status_code, headers=response.headers,
+                              stream=RecordingStream(response.stream, started, save),
+                              extensions=response.extensions)
+
+    def close(self):
+        self.inner.close()
+
+
+class ReplayTransport(httpx.BaseTransport):
+    """
+    Serves exchanges saved by RecordingTransport, pacing each chunk as it was
+    originally received. An unknown request gets a recording of the same kind
+    (streaming or not) picked by its hash, unless `strict` is set, in which case
+    it gets a 404.
+    """
+
+    def __init__(self, directory, strict=False, speed=1.0):
+        self.directory = directory
+        self.strict = strict
+        self.speed = speed
+        self.lock = threading.Lock()
+        self.by_stream = None
+        self.stats = {'calls': 0, 'exact': 0, 'substituted': 0, 'missing': 0}
+
+    def recordings(self, stream):
+        """Recording names by kind, listed once"""
+        with self.lock:
+            if self.by_stream is None:
+                self.by_stream = {True: [], False: []}
+                names = sorted(n for n in os.listdir(self.directory) if n.endswith('.json')) \
+                    if os.path.isdir(self.directory) else []
+                for name in names:
+                    with open(os.path.join(self.directory, name), encoding='utf-8') as f:
+                        self.by_stream[bool(json.load(f).get('stream'))].append(name[:-len('.json')])
+            return self.by_stream[stream]
+
+    def count(self, outcome):
+        with self.lock:
+            self.stats['calls'] += 1
+            self.stats[outcome] += 1
+
+    def handle_request(self, request):
+        body = read_body(request)
+        key = request_key(request, body)
+        path = os.path.join(self.directory, key + '.json')
+        if os.path.exists(path):
+            self.count('exact')
+        else:
+            candidates = [] if self.strict else self.recordings(bool(body.get('stream')))
+            if not candidates:
+                self.count('missing')
+                return httpx.Response(404, json={'error': {
+                    'message': f'No recorded response for request {key}', 'type': 'not_found'
+                }})
+            self.count('substituted')
+            path = os.path.join(self.directory, candidates[int(key, 16) % len(candidates)] + '.json')
+
+        with open(path, encoding='utf-8') as f:
+            record = json.load(f)
+        return httpx.Response(record['status'], headers=record['headers'],
+                              content=self.paced(record['chunks'], time.perf_counter()))
+
+    def paced(self, chunks, started):
+        for offset, text in chunks:
+            wait = started + offset / self.speed - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            yield text.encode('utf-8', 'surrogateescape')
+
+
+# ------------------------------
+# HTTP server
+# ------------------------------
+# Hop-by-hop and framing headers are set by the serving WSGI server itself
+SKIPPED_HEADERS = frozenset({'content-length', 'transfer-encoding', 'connection', 'keep-alive', 'content-encoding'})
+
+
+def wsgi_app(transport, upstream=GROQ_API_URL):
+    """WSGI application answering every request through `transport`"""
+    def application(environ, start_response):
+        length = int(environ.get('CONTENT_LENGTH') or 0)
+        url = upstream + environ.get('PATH_INFO', '')
+        if environ.get('QUERY_STRING'):
+            url += '?' + environ['QUERY_STRING']
+        headers = {
+            name[len('HTTP_'):].replace('_', '-').lower(): value
+            for name, value in environ.items() if name.startswith('HTTP_') and name != 'HTTP_HOST'
+        }
+        if environ.get('CONTENT_TYPE'):
+            headers['content-type'] = environ['CONTENT_TYPE']
+        request = httpx.Request(environ['REQUEST_METHOD'], url, headers=headers,
+                                content=environ['wsgi.input'].read(length))
+        try:
+            response = transport.handle_request(request)
+        except httpx.TimeoutException:
+            start_response('504 Gateway Timeout', [('Content-Type', 'application/json')])
+            return [b'{"error": {"message": "Upstream timed out", "type": "timeout"}}']
+
+        start_response(f'{response.status_code} {response.reason_phrase}', [
+            (name, value) for name, value in response.headers.items() if name.lower() not in SKIPPED_HEADERS
+        ])
+        return response.stream
+
+    return application
+
+
+def serve(transport, host='127.0.0.1', port=8001):
+    """Run an OpenAI/Groq-compatible server backed by `transport` until interrupted"""
+    from werkzeug.serving import run_simple
+    run_simple(host, port, wsgi_app(transport), threaded=True)
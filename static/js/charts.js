@@ -421,6 +421,23 @@ class HealingCharts {
         }
     }
 
+    async loadProgress(chartName, { from, to, bucket = 'day' } = {}, score = 'mood') {
+        // Rollups from /api/progress: one averaged point per day, week or month in the range
+        const chart = this.charts.get(chartName);
+        if (!chart) return null;
+
+        const params = new URLSearchParams({ bucket });
+        if (from) params.set('from', from);
+        if (to) params.set('to', to);
+        const response = await fetch(`/api/progress?${params}`);
+        if (!response.ok) return null;
+
+        const series = await response.json();
+        chart.data.labels = series.labels;
+        this.updateChart(chartName, series[score].avg);
+        return series;
+    }
+
     animateValue(element, start, end, duration) {
         let startTimestamp = null;
         const step = (timestamp) => {
@@ -342,8 +342,26 @@ class HealingHorizonsApp {
         document.body.appendChild(modal);
     }
 
-    exportJournal() {
-        const entries = document.querySelectorAll('.journal-entry');
+    async exportJournal(url = '/api/journal') {
+        // Page through the whole journal rather than the entries currently on screen
+        const entries = [];
+        let cursor = null;
+        try {
+            do {
+                const params = new URLSearchParams({ limit: 100 });
+                if (cursor) params.set('before', cursor);
+                const response = await fetch(`${url}?${params}`);
+                if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                const page = await response.json();
+                entries.push(...page.entries);
+                cursor = page.next_cursor;
+            } while (cursor);
+        } catch (error) {
+            console.error('Could not export the journal:', error);
+            this.showToast('Error exporting journal. Please try again.', 'error');
+            return;
+        }
+
         if (entries.length === 0) {
             this.showToast('No entries to export', 'error');
             return;
@@ -355,22 +373,23 @@ class HealingHorizonsApp {
                 exportedAt: new Date().toLocaleString(),
                 totalEntries: entries.length
             },
-            history: Array.from(entries).map(entry => ({
-                date: entry.querySelector('.text-sm')?.textContent || '',
-                mood: entry.querySelector('.font-medium')?.textContent || '',
-                content: entry.querySelector('p')?.textContent.trim() || ''
+            history: entries.map(entry => ({
+                date: `${entry.date_label} ${entry.time_label}`,
+                mood: entry.mood || '',
+                tags: entry.tags,
+                content: entry.content || ''
             }))
         };
 
         const blob = new Blob([JSON.stringify(data, null, 2)], { type: 'application/json' });
-        const url = URL.createObjectURL(blob);
+        const blobUrl = URL.createObjectURL(blob);
         const a = document.createElement('a');
-        a.href = url;
+        a.href = blobUrl;
         a.download = `healing-horizons-journal-${new Date().toISOString().split('T')[0]}.json`;
         document.body.appendChild(a);
         a.click();
         document.body.removeChild(a);
-        URL.revokeObjectURL(url);
+        URL.revokeObjectURL(blobUrl);
 
         this.showToast('Journal exported successfully!');
     }
@@ -0,0 +1,121 @@
+"""
+Tests for app.py routes against a throwaway SQLite database and the mock LLM backend
+"""
+import json
+import os
+import tempfile
+
+WORKDIR = tempfile.mkdtemp(prefix='hh-test-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(WORKDIR, 'test.db')}"
+os.environ['GROQ_API_KEY'] = 'test-key'
+os.environ['LLM_BACKEND'] = 'mock'
+os.environ['MOCK_LLM_LATENCY'] = '0'
+os.environ['STREAM_RESULTS'] = 'false'
+
+import app as app_module
+
+app_module.init_app()
+app = app_module.app
+db = app_module.db
+
+
+def make_user(name):
+    """Create a user and return its id"""
+    with app.app_context():
+        user = app_module.User(username=name, email=f'{name}@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+def client_for(user_id):
+    """Test client logged in as the user"""
+    client = app.test_client()
+    # The session cookie is Secure, so the client must speak https to send it back
+    client.environ_base['wsgi.url_scheme'] = 'https'
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+    return client
+
+
+def sse_events(body):
+    """(event, data) pairs from a server-sent event stream"""
+    events = []
+    for frame in body.split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in frame.splitlines() if ': ' in line)
+        if 'event' in fields:
+            events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def set_rate_limited(blocked):
+    """Block LLM calls for every worker, or lift the block"""
+    def mutate(values, now):
+        values['blocked_until'] = now + app_module.timedelta(minutes=5) if blocked else None
+    with app.app_context():
+        app_module.update_rate_limit_state(mutate)
+
+
+def test_rate_limited_plan_is_served_from_a_warm_cache():
+    """While rate-limited, cached sections are still served and only the rest falls back"""
+    user_id = make_user('cached_plan')
+    user_input = 'We broke up after five years together'
+    with app.app_context():
+        agents_config = app_module.plan_agents_config('test-key', user_input, '7day')
+        cache_keys = app_module.plan_cache_keys(agents_config, user_input, '7day')
+        cached = {agent_name: f'Cached {agent_name} answer' for agent_name in ('therapist', 'planner', 'closure')}
+        app_module.store_cached_responses(cache_keys, cached)
+        fallback = app_module.get_fallback_responses(user_input, '7day')
+
+    set_rate_limited(True)
+    try:
+        client = client_for(user_id)
+        response = client.post('/generate_plan', data={'user_input': user_input, 'plan_type': '7day'})
+        assert response.status_code == 302
+        with app.app_context():
+            result = db.session.get(app_module.PlanResult, response.location.rsplit('/', 1)[-1])
+            assert json.loads(result.responses) == {**cached, 'honesty': fallback['honesty']}
+
+        stream = client.post('/generate_plan/stream', data={'user_input': user_input, 'plan_type': '7day'})
+        events = sse_events(stream.get_data(as_text=True))
+        assert {data['agent'] for event, data in events if event == 'html'} == set(cached)
+        assert [data['agent'] for event, data in events if event == 'fallback'] == ['honesty']
+    finally:
+        set_rate_limited(False)
+
+
+def test_out_of_range_journal_cursor_is_rejected():
+    """A cursor id beyond SQLite's 64-bit range is a 400 from the API and ignored by the page"""
+    client = client_for(make_user('journal_cursor'))
+    cursor = f'2024-01-01T00:00:00_{2 ** 63}'
+    response = client.get('/api/journal', query_string={'before': cursor})
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Invalid cursor'}
+    assert client.get('/journal', query_string={'before': cursor}).status_code == 200
+    assert client.get('/api/journal', query_string={'before': '2024-01-01T00:00:00_0'}).status_code == 400
+
+
+def test_progress_range_at_the_start_of_the_calendar():
+    """Dates next to date.min are a 400 or an empty series, never an overflow"""
+    client = client_for(make_user('progress_min_date'))
+    for bucket in ('day', 'week', 'month'):
+        response = client.get('/api/progress', query_string={'bucket': bucket, 'to': '0001-01-01'})
+        assert response.status_code == 400
+        response = client.get('/api/progress', query_string={'bucket': bucket, 'from': '0001-01-01', 'to': '0001-01-05'})
+        assert response.status_code == 200
+        assert response.get_json()['entries'] == []
+
+
+def test_streamed_fragments_skip_the_markdown_cache():
+    """Only finished sections enter the markdown cache, so fragments cannot evict the warmed fallbacks"""
+    client = client_for(make_user('stream_markdown'))
+    with app.app_context():
+        app_module.warm_markdown_cache()
+    before = set(app_module._MARKDOWN_CACHE)
+
+    stream = client.post('/generate_plan/stream', data={'user_input': 'They moved abroad', 'plan_type': '7day'})
+    events = sse_events(stream.get_data(as_text=True))
+    assert any(event == 'html' for event, _ in events)
+    finished = {data['html'] for event, data in events if event == 'complete'}
+    assert before <= set(app_module._MARKDOWN_CACHE)
+    assert len(app_module._MARKDOWN_CACHE) - len(before) == len(finished)